@@ -0,0 +1,158 @@
+import argparse
+import os
+import re
+import sys
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+import pandas as pd
+
+from jsonl_io import read_records
+from profiling import configure_profiling, profile_stage
+
+AGGREGATES_DIR = os.getenv('AGGREGATES_DIR', 'aggregates')
+
+DIMENSIONS = ('location', 'industry', 'work_mode', 'key_skills')
+
+# Skills have a long tail; keep only the most frequent per day so day files stay small
+MAX_SKILLS_PER_DAY = 200
+
+
+def _parse_day(day: str) -> date:
+    """Accept YYYYMMDD or YYYY-MM-DD."""
+    return datetime.strptime(day.replace('-', ''), '%Y%m%d').date()
+
+
+def _day_path(day: date, root: str = AGGREGATES_DIR) -> str:
+    return os.path.join(root, f"daily_{day.isoformat()}.csv")
+
+
+def compute_daily_aggregates(records: Iterable[Dict[str, Any]]) -> pd.DataFrame:
+    """Count one day's analyzed jobs by location, industry, work_mode and key skill."""
+    frame = pd.DataFrame.from_records(
+        [{dimension: job.get(dimension) for dimension in DIMENSIONS} for job in records if isinstance(job, dict)],
+        columns=list(DIMENSIONS)
+    )
+    parts = [pd.DataFrame({'dimension': ['total'], 'value': ['all'], 'count': [len(frame)]})]
+
+    for dimension in ('location', 'industry', 'work_mode'):
+        values = frame[dimension].fillna('').astype(str).str.strip().replace('', 'Unknown')
+        counts = values.value_counts()
+        parts.append(pd.DataFrame({'dimension': dimension, 'value': counts.index, 'count': counts.to_numpy()}))
+
+    skills = frame['key_skills'].explode().dropna().astype(str).str.strip()
+    skills = skills[skills != '']
+    counts = skills.value_counts().head(MAX_SKILLS_PER_DAY)
+    parts.append(pd.DataFrame({'dimension': 'key_skills', 'value': counts.index, 'count': counts.to_numpy()}))
+
+    return pd.concat(parts, ignore_index=True)
+
+
+def update_daily_aggregates(day: str, records: Iterable[Dict[str, Any]], root: str = AGGREGATES_DIR) -> str:
+    """Materialize the aggregates of one day, replacing any earlier aggregates for that day."""
+    aggregates = compute_daily_aggregates(records)
+    os.makedirs(root, exist_ok=True)
+    path = _day_path(_parse_day(day), root)
+    aggregates.to_csv(path, index=False)
+    total = int(aggregates.loc[aggregates['dimension'] == 'total', 'count'].iloc[0])
+    print(f"Saved aggregates of {total} jobs to {path}")
+    return path
+
+
+def load_window(end: date, days: int, root: str = AGGREGATES_DIR) -> pd.DataFrame:
+    """Load the daily aggregates of the `days` days ending at `end`; only those files are read."""
+    frames = []
+    for offset in range(days):
+        day = end - timedelta(days=offset)
+        path = _day_path(day, root)
+        if os.path.exists(path):
+            frame = pd.read_csv(path, keep_default_na=False, dtype={'value': str})
+            frame['date'] = pd.Timestamp(day)
+            frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=['dimension', 'value', 'count', 'date'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def trend_report(as_of: Optional[str] = None, windows: Sequence[int] = (7, 30),
+                 dimensions: Sequence[str] = ('location', 'industry'), top: int = 10,
+                 root: str = AGGREGATES_DIR) -> Dict[int, pd.DataFrame]:
+    """
+    Compare each window with the window right before it, per dimension value.
+
+    For a 7-day window the last 7 days (ending at as_of) are compared with the
+    7 days before them. Only 2 * max(windows) day files are read, however much
+    history exists. Returns one DataFrame per window with the `top` values of
+    each dimension by current count.
+    """
+    end = _parse_day(as_of) if as_of else date.today()
+    history = load_window(end, 2 * max(windows), root)
+    history = history[history['dimension'].isin(dimensions)]
+
+    age = (pd.Timestamp(end) - pd.to_datetime(history['date'])).dt.days
+
+    reports = {}
+    for window in windows:
+        period = pd.Series(pd.NA, index=history.index, dtype=object)
+        period[age < window] = 'current'
+        period[(age >= window) & (age < 2 * window)] = 'previous'
+
+        counts = (
+            history.assign(period=period)
+            .dropna(subset=['period'])
+            .groupby(['dimension', 'value', 'period'])['count'].sum()
+            .unstack('period', fill_value=0)
+            .reindex(columns=['current', 'previous'], fill_value=0)
+            .rename_axis(columns=None)
+        )
+        counts['change'] = counts['current'] - counts['previous']
+        previous = counts['previous'].where(counts['previous'] > 0)
+        counts['change_pct'] = (counts['change'] / previous * 100).round(1)
+
+        reports[window] = (
+            counts.reset_index()
+            .sort_values(['dimension', 'current'], ascending=[True, False])
+            .groupby('dimension', sort=False)
+            .head(top)
+            .reset_index(drop=True)
+        )
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Daily labor-market aggregates and trend report")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    update_parser = subparsers.add_parser('update', help="materialize aggregates from analyzed job files")
+    update_parser.add_argument('files', nargs='+')
+
+    report_parser = subparsers.add_parser('report', help="print the rolling trend report")
+    report_parser.add_argument('--date', help="last day of the report (YYYYMMDD), default today")
+    report_parser.add_argument('--windows', default='7,30', help="comma-separated window lengths in days")
+    report_parser.add_argument('--dimensions', default='location,industry')
+    report_parser.add_argument('--top', type=int, default=10)
+
+    args = parser.parse_args()
+
+    if args.command == 'update':
+        for path in args.files:
+            match = re.search(r'(\d{8})', os.path.basename(path))
+            if not match:
+                print(f"Skipping {path}: no YYYYMMDD date in file name")
+                continue
+            update_daily_aggregates(match.group(1), read_records(path))
+        return 0
+
+    windows = [int(window) for window in args.windows.split(',')]
+    reports = trend_report(args.date, windows, args.dimensions.split(','), args.top)
+    for window, report in reports.items():
+        print(f"\n=== Last {window} days vs previous {window} days ===")
+        print(report.to_string(index=False) if len(report) else "No aggregates in this period")
+    return 0
+
+
+if __name__ == "__main__":
+    configure_profiling()
+    with profile_stage("aggregates"):
+        exit_code = main()
+    sys.exit(exit_code)
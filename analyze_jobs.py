@@ -3,14 +3,28 @@ import google.generativeai as genai
 from datetime import datetime
 import os
 from dotenv import load_dotenv
+from itertools import chain
+from typing import Iterable
+from jsonl_io import JsonlWriter, artifact_name, batched, find_stage_file, read_records, stage_path, write_records
+from metrics import get_metrics, write_run_metrics
+from profiling import configure_profiling, profile_stage
 load_dotenv()
 
+def record_token_usage(span: dict, response) -> None:
+    """Copy token counts from a Gemini response into a metrics span, when the SDK reports them."""
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is None:
+        return
+    span["prompt_tokens"] = getattr(usage, 'prompt_token_count', None)
+    span["output_tokens"] = getattr(usage, 'candidates_token_count', None)
+    get_metrics().increment("analyze.prompt_tokens", span["prompt_tokens"] or 0)
+    get_metrics().increment("analyze.output_tokens", span["output_tokens"] or 0)
+
 def analyze_with_gemini(batch_file: str, api_key: str) -> list:
     """Analyze a batch of job postings using Gemini API."""
     try:
         # Load the batch of jobs with proper UTF-8 encoding
-        with open(batch_file, 'r', encoding='utf-8') as f:
-            jobs = json.load(f)
+        jobs = list(read_records(batch_file))
         
         print(f"Loaded {len(jobs)} jobs from {batch_file}")
         
@@ -133,11 +147,13 @@ def analyze_with_gemini(batch_file: str, api_key: str) -> list:
             full_prompt = standardization_prompt + jobs_text
             
             # First attempt with safety parameters
-            response = model.generate_content(full_prompt, generation_config={
-                "temperature": 0.1,  # More deterministic
-                "top_p": 0.8,
-                "top_k": 40
-            })
+            with get_metrics().span("analyze.llm_call", path="chunk", jobs=len(chunk)) as llm_span:
+                response = model.generate_content(full_prompt, generation_config={
+                    "temperature": 0.1,  # More deterministic
+                    "top_p": 0.8,
+                    "top_k": 40
+                })
+                record_token_usage(llm_span, response)
             
             response_text = response.text
             # Remove any markdown formatting
@@ -152,12 +168,15 @@ def analyze_with_gemini(batch_file: str, api_key: str) -> list:
                 print(f"Successfully processed {len(chunk_jobs)} jobs from chunk {i//max_jobs_per_request + 1}")
             except json.JSONDecodeError as e:
                 print(f"Error with chunk, trying one-by-one processing for jobs {i} to {i+len(chunk)-1}")
+                get_metrics().increment("analyze.chunk_fallbacks")
                 
                 # Process each job individually as a last resort
                 for job in chunk:
                     try:
                         single_job_prompt = standardization_prompt + "\n\nJOB TO PROCESS:\n\n" + "\n".join([f"{k}: {v}" for k, v in job.items()])
-                        single_response = model.generate_content(single_job_prompt)
+                        with get_metrics().span("analyze.llm_call", path="single_fallback", jobs=1) as llm_span:
+                            single_response = model.generate_content(single_job_prompt)
+                            record_token_usage(llm_span, single_response)
                         single_text = single_response.text
                         
                         if "```json" in single_text:
@@ -173,6 +192,7 @@ def analyze_with_gemini(batch_file: str, api_key: str) -> list:
                             all_analyzed_jobs.append(single_job_result)
                     except Exception as e:
                         print(f"Failed to process individual job: {str(e)}")
+                        get_metrics().increment("analyze.jobs_failed")
         
         return all_analyzed_jobs
         
@@ -180,6 +200,28 @@ def analyze_with_gemini(batch_file: str, api_key: str) -> list:
         print(f"Error analyzing batch {batch_file}: {e}")
         return []
 
+def analyze_records(jobs: Iterable[dict], output_file: str, api_key: str, chunk_prefix: str,
+                    max_jobs_per_file: int = 10) -> int:
+    """
+    Stream jobs through Gemini and write the results to output_file.
+    
+    Jobs are split into small JSONL chunk files of max_jobs_per_file jobs, so
+    only one chunk is held in memory at a time. Returns the number of analyzed jobs.
+    """
+    with JsonlWriter(output_file) as writer:
+        for chunk_number, chunk in enumerate(batched(jobs, max_jobs_per_file), start=1):
+            chunk_file = artifact_name(f"{chunk_prefix}_chunk{chunk_number}", 'none')
+            write_records(chunk_file, chunk)
+            print(f"Created chunk file {chunk_file} with {len(chunk)} jobs")
+            
+            # Process this chunk file
+            analyzed_jobs = analyze_with_gemini(chunk_file, api_key)
+            writer.write_all(analyzed_jobs)
+    
+    if writer.count == 0:
+        os.remove(output_file)
+    return writer.count
+
 def main():
     api_key = os.getenv('GEMINI_API_KEY')
     if not api_key:
@@ -187,7 +229,6 @@ def main():
         return
     
     today = datetime.now().strftime('%Y%m%d')
-    all_analyzed_jobs = []
     
     # Process command line arguments if any
     import sys
@@ -197,97 +238,43 @@ def main():
         print(f"Processing specific file: {specific_file}")
     
     # Set chunking parameters
-    split_into_smaller_files = True
     max_jobs_per_file = 10  # Changed from 15 to 10
     
-    # Process specific file if provided
     if specific_file and os.path.exists(specific_file):
-        if split_into_smaller_files:
-            with open(specific_file, 'r', encoding='utf-8') as f:
-                all_jobs = json.load(f)
-            
-            print(f"Found {len(all_jobs)} jobs in {specific_file}")
-            
-            # Create smaller files with max_jobs_per_file jobs each
-            for i in range(0, len(all_jobs), max_jobs_per_file):
-                chunk = all_jobs[i:i+max_jobs_per_file]
-                chunk_file = f"{specific_file.split('.')[0]}_chunk{i//max_jobs_per_file + 1}.json"
-                
-                with open(chunk_file, 'w', encoding='utf-8') as f:
-                    json.dump(chunk, f, ensure_ascii=False, indent=2)
-                
-                print(f"Created chunk file {chunk_file} with {len(chunk)} jobs")
-                
-                # Process this chunk file
-                analyzed_jobs = analyze_with_gemini(chunk_file, api_key)
-                if analyzed_jobs:
-                    all_analyzed_jobs.extend(analyzed_jobs)
-        else:
-            # Process the whole file as before
-            analyzed_jobs = analyze_with_gemini(specific_file, api_key)
-            if analyzed_jobs:
-                all_analyzed_jobs.extend(analyzed_jobs)
+        input_files = [specific_file]
+        # If processing a specific file, use its name in the output
+        name_part = os.path.basename(specific_file).split('.')[0]
+        chunk_prefix = name_part
+        output_file = artifact_name(f"{name_part}_analyzed")
     else:
+        # Legacy batch files first, then the scraper's detailed jobs file
+        input_files = []
         batch_number = 1
-        
-        # Process each batch file
-        while True:
-            batch_file = f"jobs_raw_{today}_batch{batch_number}.json"
-            if not os.path.exists(batch_file):
-                detailed_file = f"detailed_jobs_{today}.json"
-                if os.path.exists(detailed_file):
-                    print(f"\nProcessing detailed jobs file: {detailed_file}")
-                    
-                    # Split the detailed file into smaller chunks if needed
-                    if split_into_smaller_files:
-                        with open(detailed_file, 'r', encoding='utf-8') as f:
-                            all_jobs = json.load(f)
-                        
-                        print(f"Found {len(all_jobs)} jobs in {detailed_file}")
-                        
-                        # Create smaller files with max_jobs_per_file jobs each
-                        for i in range(0, len(all_jobs), max_jobs_per_file):
-                            chunk = all_jobs[i:i+max_jobs_per_file]
-                            chunk_file = f"detailed_jobs_{today}_chunk{i//max_jobs_per_file + 1}.json"
-                            
-                            with open(chunk_file, 'w', encoding='utf-8') as f:
-                                json.dump(chunk, f, ensure_ascii=False, indent=2)
-                            
-                            print(f"Created chunk file {chunk_file} with {len(chunk)} jobs")
-                            
-                            # Process this chunk file
-                            analyzed_jobs = analyze_with_gemini(chunk_file, api_key)
-                            if analyzed_jobs:
-                                all_analyzed_jobs.extend(analyzed_jobs)
-                    else:
-                        # Process the whole file as before
-                        analyzed_jobs = analyze_with_gemini(detailed_file, api_key)
-                        if analyzed_jobs:
-                            all_analyzed_jobs.extend(analyzed_jobs)
-                    break
-                else:
-                    break
-            else:
-                print(f"\nProcessing batch {batch_number}")
-                analyzed_jobs = analyze_with_gemini(batch_file, api_key)
-                if analyzed_jobs:
-                    all_analyzed_jobs.extend(analyzed_jobs)
-                batch_number += 1
+        while os.path.exists(f"jobs_raw_{today}_batch{batch_number}.json"):
+            print(f"\nProcessing batch {batch_number}")
+            input_files.append(f"jobs_raw_{today}_batch{batch_number}.json")
+            batch_number += 1
+        if not input_files:
+            detailed_file = find_stage_file('raw', today)
+            if detailed_file:
+                print(f"\nProcessing detailed jobs file: {detailed_file}")
+                input_files.append(detailed_file)
+        chunk_prefix = f"detailed_jobs_{today}"
+        output_file = stage_path('analyzed', today)
     
-    # Save all analyzed jobs to a single file
-    if all_analyzed_jobs:
-        # If processing a specific file, use its name in the output
-        if specific_file:
-            base_name = os.path.basename(specific_file)
-            name_part = base_name.split('.')[0]
-            output_file = f"{name_part}_analyzed.json"
-        else:
-            output_file = f"jobs_analyzed_{today}.json"
-            
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(all_analyzed_jobs, f, ensure_ascii=False, indent=2)
+    if not input_files:
+        print(f"No scraped jobs found for {today}")
+        return
+    
+    jobs = chain.from_iterable(read_records(input_file) for input_file in input_files)
+    with get_metrics().span("stage.analyze"), profile_stage("analyze"):
+        total_analyzed = analyze_records(jobs, output_file, api_key, chunk_prefix, max_jobs_per_file)
+    
+    if total_analyzed:
         print(f"\nAll analyzed jobs saved to: {output_file}")
-        print(f"Total jobs analyzed: {len(all_analyzed_jobs)}")
+        print(f"Total jobs analyzed: {total_analyzed}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    configure_profiling()
+    main()
+    write_run_metrics()
@@ -0,0 +1,198 @@
+import json
+import os
+import re
+import sys
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from jsonl_io import batched, read_records
+from profiling import configure_profiling, profile_stage
+
+ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', 'archive')
+ROW_GROUP_SIZE = 10000
+
+_string_list = pa.list_(pa.string())
+
+# Keys of a record that have no column of their own, as a JSON object; nothing is dropped
+EXTRA_COLUMN = 'extra'
+
+RAW_SCHEMA = pa.schema([
+    ('job_id', pa.string()),
+    ('title', pa.string()),
+    ('company', pa.string()),
+    ('location', pa.string()),
+    ('region', pa.string()),
+    ('posted_date', pa.string()),
+    ('application_deadline', pa.string()),
+    ('job_url', pa.string()),
+    ('description', pa.string()),
+    ('requirements', _string_list),
+    ('benefits', _string_list),
+    ('application_method', pa.string()),
+    ('contact_info', pa.string()),
+    ('source', pa.string()),
+    (EXTRA_COLUMN, pa.string()),
+])
+
+ANALYZED_SCHEMA = pa.schema([
+    ('job_id', pa.string()),
+    ('title', pa.string()),
+    ('company', pa.string()),
+    ('location', pa.string()),
+    ('town_location', pa.string()),
+    ('posted_date', pa.string()),
+    ('application_deadline', pa.string()),
+    ('job_url', pa.string()),
+    ('work_mode', pa.string()),
+    ('industry', pa.string()),
+    ('compensation', pa.struct([
+        ('salary_range', pa.string()),
+        ('benefits_package', pa.string()),
+    ])),
+    ('company_info', pa.struct([
+        ('size', pa.string()),
+        ('years_active', pa.string()),
+        ('business_scale', pa.string()),
+    ])),
+    ('employment_type', pa.string()),
+    ('required_qualifications', _string_list),
+    ('preferred_qualifications', _string_list),
+    ('responsibilities', _string_list),
+    ('benefits', _string_list),
+    ('department_size', pa.string()),
+    ('key_skills', _string_list),
+    ('languages', _string_list),
+    ('application_method', pa.string()),
+    (EXTRA_COLUMN, pa.string()),
+])
+
+SCHEMAS = {'raw': RAW_SCHEMA, 'analyzed': ANALYZED_SCHEMA}
+
+# Hive-style `date=YYYY-MM-DD` directories; ISO strings compare correctly as text
+PARTITIONING = ds.partitioning(pa.schema([('date', pa.string())]), flavor='hive')
+
+
+def _coerce(value: Any, field_type: pa.DataType) -> Any:
+    """Coerce a loosely typed JSON value to the archive column type."""
+    if value is None:
+        return None
+    if pa.types.is_list(field_type):
+        if not isinstance(value, list):
+            return None
+        return [str(item) for item in value if item is not None]
+    if pa.types.is_struct(field_type):
+        if not isinstance(value, dict):
+            return None
+        return {
+            field_type.field(i).name: _coerce(value.get(field_type.field(i).name), field_type.field(i).type)
+            for i in range(field_type.num_fields)
+        }
+    return value if isinstance(value, str) else str(value)
+
+
+def _to_table(records: Iterable[Dict[str, Any]], schema: pa.Schema) -> pa.Table:
+    fields = [field for field in schema if field.name != EXTRA_COLUMN]
+    known = {field.name for field in fields}
+    columns = {field.name: [] for field in schema}
+    for record in records:
+        for field in fields:
+            columns[field.name].append(_coerce(record.get(field.name), field.type))
+        extra = {key: value for key, value in record.items() if key not in known}
+        columns[EXTRA_COLUMN].append(json.dumps(extra, ensure_ascii=False, default=str) if extra else None)
+    return pa.table(columns, schema=schema)
+
+
+def _iso_date(day: str) -> str:
+    """Accept YYYYMMDD or YYYY-MM-DD and return YYYY-MM-DD."""
+    return datetime.strptime(day.replace('-', ''), '%Y%m%d').strftime('%Y-%m-%d')
+
+
+def write_partition(kind: str, day: str, records: Iterable[Dict[str, Any]],
+                    root: str = ARCHIVE_DIR) -> Optional[str]:
+    """Write one day's records of the given kind ('raw' or 'analyzed'), replacing that day's partition."""
+    schema = SCHEMAS[kind]
+    partition_dir = os.path.join(root, kind, f"date={_iso_date(day)}")
+    path = os.path.join(partition_dir, 'part-0.parquet')
+    tmp_path = path + '.tmp'
+
+    # Records are streamed in row groups so a large day never sits in memory as a whole
+    num_rows = 0
+    writer = None
+    for batch in batched(records, ROW_GROUP_SIZE):
+        if writer is None:
+            os.makedirs(partition_dir, exist_ok=True)
+            writer = pq.ParquetWriter(tmp_path, schema, compression='zstd')
+        writer.write_table(_to_table(batch, schema))
+        num_rows += len(batch)
+    if writer is None:
+        return None
+    writer.close()
+    os.replace(tmp_path, path)
+    print(f"Archived {num_rows} {kind} jobs to {path}")
+    return path
+
+
+def archive_day(day: str, raw_jobs: Optional[Iterable[Dict[str, Any]]] = None,
+                analyzed_jobs: Optional[Iterable[Dict[str, Any]]] = None, root: str = ARCHIVE_DIR) -> None:
+    """Archive a day's raw and analyzed jobs into the partitioned Parquet dataset."""
+    if raw_jobs:
+        write_partition('raw', day, raw_jobs, root)
+    if analyzed_jobs:
+        write_partition('analyzed', day, analyzed_jobs, root)
+
+
+def scan(kind: str, columns: Optional[List[str]] = None, start: Optional[str] = None,
+         end: Optional[str] = None, filter: Optional[ds.Expression] = None,
+         root: str = ARCHIVE_DIR) -> pa.Table:
+    """
+    Read archived jobs of the given kind with column projection and an inclusive date range.
+
+    Only partitions inside [start, end] are opened and only the requested
+    columns are decoded. An extra pyarrow filter expression can be passed.
+    """
+    path = os.path.join(root, kind)
+    if not os.path.isdir(path):
+        return SCHEMAS[kind].empty_table()
+
+    dataset = ds.dataset(path, format='parquet', schema=SCHEMAS[kind].append(pa.field('date', pa.string())),
+                         partitioning=PARTITIONING)
+    expression = filter
+    if start:
+        condition = ds.field('date') >= _iso_date(start)
+        expression = condition if expression is None else expression & condition
+    if end:
+        condition = ds.field('date') <= _iso_date(end)
+        expression = condition if expression is None else expression & condition
+    return dataset.to_table(columns=columns, filter=expression)
+
+
+def import_json_files(paths: List[str], root: str = ARCHIVE_DIR) -> None:
+    """Backfill the archive from existing detailed_jobs_* / jobs_analyzed_* stage files."""
+    for path in paths:
+        match = re.search(r'(\d{8})', os.path.basename(path))
+        if not match:
+            print(f"Skipping {path}: no YYYYMMDD date in file name")
+            continue
+        kind = 'analyzed' if 'analyzed' in os.path.basename(path) else 'raw'
+        write_partition(kind, match.group(1), read_records(path), root)
+
+
+def main():
+    # Usage: python archive.py detailed_jobs_*.jsonl.gz jobs_analyzed_*.jsonl.gz
+    paths = sys.argv[1:]
+    if not paths:
+        print("Usage: python archive.py <detailed_jobs_YYYYMMDD.* | jobs_analyzed_YYYYMMDD.*> ...")
+        return 1
+    import_json_files(paths)
+    return 0
+
+
+if __name__ == "__main__":
+    configure_profiling()
+    with profile_stage("archive"):
+        exit_code = main()
+    sys.exit(exit_code)
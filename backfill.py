@@ -0,0 +1,212 @@
+"""
+Backfill: scrape the vacancies of a range of past dates.
+
+Every date is scraped as its own window, with the ESS search filtered to
+vacancies published on that date (and optionally a location and country),
+in its own browser. Up to BACKFILL_WORKERS windows run at once. Each window
+writes the day's raw stage file, detailed_jobs_<day>.jsonl.gz, so the
+pipeline analyzes and uploads it like a daily run; --pipeline does that as
+soon as each window finishes.
+
+A vacancy listed in several windows is only opened by the first window to
+reach it. Dates that already have a raw file are skipped (their vacancies
+count as scraped) unless --force is given, so an interrupted backfill can be
+started again with the same command.
+
+    python backfill.py --from 20250301 --to 20250331
+    python backfill.py --from 20250301 --to 20250307 --location Maribor --workers 3 --pipeline
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from jsonl_io import find_stage_file, read_records, stage_path, write_records
+from metrics import get_metrics, write_run_metrics
+from profiling import configure_profiling
+
+load_dotenv()
+
+BACKFILL_WORKERS = int(os.getenv('BACKFILL_WORKERS', '2'))
+
+
+def date_range(start: str, end: str) -> List[str]:
+    """Every day from start to end inclusive, as YYYYMMDD strings."""
+    first = datetime.strptime(start, '%Y%m%d')
+    last = datetime.strptime(end, '%Y%m%d')
+    if last < first:
+        raise ValueError(f"End date {end} is before start date {start}")
+    return [(first + timedelta(days=offset)).strftime('%Y%m%d') for offset in range((last - first).days + 1)]
+
+
+class ClaimedKeys:
+    """
+    Vacancy card keys shared by the backfill windows.
+
+    Each window filters its list through its own WindowClaims view, so the
+    first window to ask about a vacancy claims and scrapes it and every later
+    window sees it as already taken. Claims a window did not turn into a
+    scraped job are released again.
+    """
+
+    def __init__(self, keys: Iterable[str] = ()):
+        self._keys = set(keys)
+        self._lock = threading.Lock()
+
+    def claim(self, key: str) -> bool:
+        """Claim a key; False if another window already has it."""
+        with self._lock:
+            if key in self._keys:
+                return False
+            self._keys.add(key)
+            return True
+
+    def release(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            self._keys.difference_update(keys)
+
+    def window(self) -> 'WindowClaims':
+        return WindowClaims(self)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add_jobs(self, path: str) -> None:
+        """Mark the vacancies of an existing raw file as scraped."""
+        with self._lock:
+            for job in read_records(path):
+                if job.get('job_id'):
+                    self._keys.add(str(job['job_id']))
+                self._keys.add(f"{job.get('title', '')}|{job.get('company', '')}")
+
+
+class WindowClaims:
+    """One window's skip_keys: the membership test claims the key for this window."""
+
+    def __init__(self, shared: ClaimedKeys):
+        self.shared = shared
+        self.claimed = set()
+
+    def __contains__(self, key: str) -> bool:
+        if key in self.claimed:
+            return False
+        if not self.shared.claim(key):
+            return True
+        self.claimed.add(key)
+        return False
+
+    def release_unscraped(self, scraped_keys: Iterable[Optional[str]]) -> int:
+        """Give back the claims of vacancies this window did not scrape; returns how many."""
+        unscraped = self.claimed - set(scraped_keys)
+        self.shared.release(unscraped)
+        self.claimed -= unscraped
+        return len(unscraped)
+
+
+def scrape_window(day: str, claimed: ClaimedKeys, location: str = '', country: str = 'SI',
+                  limit: Optional[int] = None) -> Tuple[str, int]:
+    """
+    Scrape the vacancies published on day into its raw stage file; returns (day, jobs written).
+
+    A scrape that stops early raises before the file is written, so a rerun
+    scrapes the date again.
+    """
+    from scraper import ESSJobScraper, search_url
+
+    url = search_url(datetime.strptime(day, '%Y%m%d').date(), location, country)
+    print(f"[{day}] Scraping {url}")
+    window = claimed.window()
+    scraper = ESSJobScraper(base_url=url)
+    completed = False
+    try:
+        with get_metrics().span("backfill.window", day=day) as window_span:
+            jobs = scraper.scrape_jobs_with_selenium(limit=limit, skip_keys=window)
+            window_span["jobs"] = len(jobs)
+        completed = True
+    finally:
+        # Vacancies claimed but not scraped are left to other windows; a failed window writes
+        # nothing, so it gives back every claim
+        released = window.release_unscraped(scraper.scraped_keys if completed else [])
+        if released:
+            print(f"[{day}] Released {released} vacancies that were not scraped")
+    if not jobs:
+        print(f"[{day}] No new vacancies")
+        return day, 0
+
+    path = stage_path('raw', day)
+    saved = write_records(path, jobs)
+    print(f"[{day}] Saved {saved} vacancies to {path}")
+    return day, saved
+
+
+def backfill(days: List[str], location: str = '', country: str = 'SI', workers: int = BACKFILL_WORKERS,
+             limit: Optional[int] = None, force: bool = False, pipeline: bool = False) -> int:
+    """Scrape the given days with at most `workers` windows at a time; returns 0 if all of them succeeded."""
+    claimed = ClaimedKeys()
+    pending = []
+    for day in days:
+        existing = find_stage_file('raw', day)
+        if existing and not force:
+            print(f"[{day}] Already scraped ({existing}), skipping")
+            claimed.add_jobs(existing)
+            continue
+        pending.append(day)
+
+    print(f"Backfilling {len(pending)} of {len(days)} days with {workers} workers")
+    started = time.perf_counter()
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='backfill') as executor:
+        futures = {executor.submit(scrape_window, day, claimed, location, country, limit): day for day in pending}
+        for future in as_completed(futures):
+            day = futures[future]
+            try:
+                _, saved = future.result()
+            except Exception as e:
+                print(f"[{day}] Backfill failed: {e}")
+                failed.append(day)
+                continue
+            get_metrics().increment("backfill.jobs", saved)
+            if pipeline and saved:
+                # Analyze and upload this day while the other windows keep scraping
+                from pipeline import run_pipeline
+                if run_pipeline(day, start='analyze') != 0:
+                    failed.append(day)
+
+    print(f"\nBackfill finished in {time.perf_counter() - started:.1f}s, {len(claimed)} vacancies seen")
+    if failed:
+        print(f"Failed days: {', '.join(sorted(failed))}")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape the ESS vacancies of a range of past dates")
+    parser.add_argument('--from', dest='start', required=True, help="first date, YYYYMMDD")
+    parser.add_argument('--to', dest='end', help="last date, YYYYMMDD (default the first date)")
+    parser.add_argument('--location', default='', help="only vacancies in this location or region")
+    parser.add_argument('--country', default='SI', help="country codes, comma separated (default SI)")
+    parser.add_argument('--workers', type=int, default=BACKFILL_WORKERS, help="dates scraped at the same time")
+    parser.add_argument('--limit', type=int, default=None, help="stop each date after this many vacancies")
+    parser.add_argument('--force', action='store_true', help="scrape dates that already have a raw file again")
+    parser.add_argument('--pipeline', action='store_true', help="run the pipeline for each date once scraped")
+    args = parser.parse_args()
+
+    try:
+        days = date_range(args.start, args.end or args.start)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    return backfill(days, args.location, args.country, args.workers, args.limit, args.force, args.pipeline)
+
+
+if __name__ == "__main__":
+    configure_profiling()
+    exit_code = main()
+    write_run_metrics(f"backfill_{datetime.now().strftime('%Y%m%d')}")
+    sys.exit(exit_code)
@@ -0,0 +1,97 @@
+"""
+Offline end-to-end benchmark of ESSJobScraper against the local ESS replica.
+
+Needs Chrome and chromedriver, like the scraper itself. Run from the
+repository root:
+
+    python -m benchmarks.bench_scraper --items 50 --latency-ms 100 --repeat 3
+"""
+import argparse
+import contextlib
+import io
+import json
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, Optional
+
+from benchmarks.ess_replica import PAGE_SIZE, ReplicaServer
+from metrics import reset_metrics
+from scraper import ESSJobScraper
+
+
+def run_benchmark(items: int, latency_ms: float, limit: Optional[int] = None,
+                  page_size: int = PAGE_SIZE, verbose: bool = False, extraction: str = 'dom') -> Dict[str, Any]:
+    """Scrape the replica once and return throughput, latency and memory figures."""
+    with ReplicaServer(items, latency_ms / 1000, page_size) as server:
+        metrics = reset_metrics(run_id=f"bench_{items}x{latency_ms:g}ms")
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        with output:
+            scraper = ESSJobScraper(base_url=server.search_url, extraction=extraction)
+            jobs = scraper.scrape_jobs_with_selenium(limit=limit)
+        elapsed = time.perf_counter() - started
+        _, python_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    summary = metrics.summary()
+    vacancy = summary.get('scrape.vacancy', {})
+    # ru_maxrss is in KiB on Linux; children include chromedriver and Chrome once they have exited
+    children_peak_kib = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+    return {
+        'items': items,
+        'latency_ms': latency_ms,
+        'extraction': extraction,
+        'scraped': len(jobs),
+        'complete': sum(1 for job in jobs if job.get('description')),
+        'elapsed_s': round(elapsed, 3),
+        'vacancies_per_s': round(len(jobs) / elapsed, 4) if elapsed else 0.0,
+        'vacancy_p50_s': vacancy.get('p50'),
+        'vacancy_p95_s': vacancy.get('p95'),
+        'vacancy_errors': vacancy.get('errors', 0),
+        'browser_startup_s': summary.get('scrape.browser_startup', {}).get('total'),
+        'list_expansion_s': summary.get('scrape.list_expansion', {}).get('total'),
+        'python_peak_mib': round(python_peak / 2 ** 20, 2),
+        'children_peak_rss_mib': round(children_peak_kib / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ESSJobScraper against a local ESS replica")
+    parser.add_argument('--items', type=int, default=50, help="vacancies served by the replica")
+    parser.add_argument('--latency-ms', type=float, default=50, help="artificial latency of each API response")
+    parser.add_argument('--limit', type=int, default=None, help="limit passed to scrape_jobs_with_selenium")
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE, help="cards added per 'show more' click")
+    parser.add_argument('--extraction', choices=('dom', 'network'), default='dom', help="how vacancy details are read")
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--output', help="write all results as JSON to this file")
+    parser.add_argument('--verbose', action='store_true', help="show the scraper's own output")
+    args = parser.parse_args()
+
+    results = []
+    for run in range(args.repeat):
+        result = run_benchmark(args.items, args.latency_ms, args.limit, args.page_size, args.verbose, args.extraction)
+        results.append(result)
+        print(f"Run {run + 1}/{args.repeat}: {result['scraped']}/{args.items} vacancies in {result['elapsed_s']}s "
+              f"({result['vacancies_per_s']}/s, p50 {result['vacancy_p50_s']}s, p95 {result['vacancy_p95_s']}s, "
+              f"python peak {result['python_peak_mib']} MiB)")
+
+    if args.repeat > 1:
+        print(f"Median throughput: {statistics.median(r['vacancies_per_s'] for r in results)} vacancies/s")
+        print(f"Median p95 latency: {statistics.median(r['vacancy_p95_s'] or 0 for r in results)} s")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved results to {args.output}")
+
+    return 0 if all(r['scraped'] == min(args.items, args.limit or args.items) for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""
+Local replica of the ESS vacancy search for offline scraper benchmarks.
+
+Serves a small single-page app with the structure ESSJobScraper relies on:
+`.list-group-item` cards, a `button.show-more-btn` pager, the
+`.card-header-title.number-text strong` total, and `.pdm-container` modals
+with the `.section-*` blocks, routed as `/#/pdm/<id>`. Vacancy data is
+loaded from JSON endpoints with configurable artificial latency.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+from urllib.parse import parse_qs, urlparse
+
+REGIONS = ['Osrednjeslovenska', 'Podravska', 'Savinjska', 'Gorenjska', 'Pomurska', 'Goriška']
+TOWNS = ['Ljubljana', 'Maribor', 'Celje', 'Kranj', 'Murska Sobota', 'Nova Gorica']
+TITLES = ['Prodajalec', 'Programer', 'Skladiščnik', 'Voznik', 'Računovodja', 'Kuhar', 'Medicinska sestra']
+COMPANIES = ['Mercator d.d.', 'Krka d.d.', 'Gorenje d.o.o.', 'Petrol d.d.', 'Lidl Slovenija d.o.o.']
+
+PAGE_SIZE = 20
+
+INDEX_HTML = """<!DOCTYPE html>
+<html lang="sl">
+<head><meta charset="utf-8"><title>ESS replica</title></head>
+<body>
+<div class="card">
+  <div class="card-header-title number-text">Število prostih delovnih mest: <strong id="total"></strong></div>
+  <div id="list" class="list-group"></div>
+  <button id="more" class="show-more-btn" style="display:none">Prikaži več</button>
+</div>
+<div id="modal"></div>
+<script>
+var PAGE_SIZE = %(page_size)d;
+var loaded = 0;
+var total = 0;
+
+function esc(text) {
+  var div = document.createElement('div');
+  div.textContent = text == null ? '' : String(text);
+  return div.innerHTML;
+}
+
+function loadPage() {
+  return fetch('/api/vacancies?offset=' + loaded + '&limit=' + PAGE_SIZE)
+    .then(function (r) { return r.json(); })
+    .then(function (data) {
+      total = data.total;
+      document.getElementById('total').textContent = total;
+      var list = document.getElementById('list');
+      data.items.forEach(function (item) {
+        var card = document.createElement('a');
+        card.id = 'vacancy-' + item.id;
+        card.className = 'list-group-item list-group-item-action set-pointer ng-star-inserted';
+        card.innerHTML = '<h5 class="list-item-title">' + esc(item.naziv) + '</h5>' +
+                         '<p class="list-item-text">' + esc(item.delodajalec) + '</p>';
+        card.addEventListener('click', function () { location.hash = '#/pdm/' + item.id; });
+        list.appendChild(card);
+      });
+      loaded += data.items.length;
+      document.getElementById('more').style.display = loaded < total ? '' : 'none';
+    });
+}
+
+function section(cls, heading, body) {
+  return '<div class="' + cls + '"><h4>' + heading + '</h4>' + body + '</div>';
+}
+
+function openModal(id) {
+  fetch('/api/vacancies/' + id)
+    .then(function (r) { return r.json(); })
+    .then(function (v) {
+      var items = function (values) {
+        return values.map(function (x) { return '<div class="body-text">' + esc(x) + '</div>'; }).join('');
+      };
+      document.getElementById('modal').innerHTML =
+        '<div class="pdm-container">' +
+        '<a class="mobile-link" href="javascript:void(0)">Nazaj</a>' +
+        '<div class="info-title vacancies-name-detail">' + esc(v.naziv) + ' | ' + esc(v.kraj) + '</div>' +
+        '<div class="vacancies-organization">' + esc(v.delodajalec) + '</div>' +
+        section('section-opis', 'Opis', '<div class="text-justify">' + esc(v.opis) + '</div>') +
+        section('section-Pricakujemo', 'Pričakujemo', items(v.pricakujemo)) +
+        section('section-nudimo', 'Nudimo', items(v.nudimo)) +
+        section('section-nacin-prijave', 'Način prijave', '<div>' + esc(v.nacinPrijave) + '</div>') +
+        section('section-kontakt', 'Kontakt za kandidata', '<div>' + esc(v.kontakt) + '</div>') +
+        '</div>';
+      document.querySelector('#modal .mobile-link').addEventListener('click', function () {
+        location.hash = '#/?datObj=TODAY';
+      });
+    });
+}
+
+function route() {
+  var match = location.hash.match(/^#\\/pdm\\/(\\w+)/);
+  if (match) {
+    openModal(match[1]);
+  } else {
+    document.getElementById('modal').innerHTML = '';
+  }
+}
+
+document.getElementById('more').addEventListener('click', loadPage);
+window.addEventListener('hashchange', route);
+loadPage().then(route);
+</script>
+</body>
+</html>
+"""
+
+
+def generate_vacancies(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Deterministic fake vacancies shaped like the ESS data the scraper extracts."""
+    rng = random.Random(seed)
+    vacancies = []
+    for i in range(count):
+        region = rng.randrange(len(REGIONS))
+        vacancies.append({
+            'id': str(1000000 + i),
+            'naziv': f"{rng.choice(TITLES).upper()} ({i + 1})",
+            'delodajalec': rng.choice(COMPANIES),
+            'kraj': TOWNS[region],
+            'regija': REGIONS[region],
+            'opis': ' '.join(['Delo obsega opravljanje del in nalog na delovnem mestu.'] * rng.randint(2, 8)),
+            'pricakujemo': [f"Zahteva {n + 1}" for n in range(rng.randint(1, 5))],
+            'nudimo': [f"Ugodnost {n + 1}" for n in range(rng.randint(0, 4))],
+            'nacinPrijave': 'Pisno na naslov delodajalca ali po elektronski pošti.',
+            'kontakt': f"kadrovska{i}@example.si",
+            'datumObjave': '2025-04-04',
+            'rokPrijave': '2025-05-04',
+        })
+    return vacancies
+
+
+class _ReplicaHandler(BaseHTTPRequestHandler):
+    server: 'ReplicaServer'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, data: Any) -> None:
+        time.sleep(self.server.latency)
+        self._send(200, json.dumps(data, ensure_ascii=False).encode('utf-8'), 'application/json; charset=utf-8')
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/api/vacancies':
+            query = parse_qs(url.query)
+            offset = int(query.get('offset', ['0'])[0])
+            limit = int(query.get('limit', [str(PAGE_SIZE)])[0])
+            items = [
+                {key: vacancy[key] for key in ('id', 'naziv', 'delodajalec', 'kraj', 'datumObjave')}
+                for vacancy in self.server.vacancies[offset:offset + limit]
+            ]
+            self._send_json({'total': len(self.server.vacancies), 'offset': offset, 'items': items})
+        elif url.path.startswith('/api/vacancies/'):
+            vacancy = self.server.by_id.get(url.path.rsplit('/', 1)[1])
+            if vacancy is None:
+                self._send(404, b'{}', 'application/json')
+            else:
+                self._send_json(vacancy)
+        elif url.path in ('/', '/index.html'):
+            html = INDEX_HTML % {'page_size': self.server.page_size}
+            self._send(200, html.encode('utf-8'), 'text/html; charset=utf-8')
+        else:
+            self._send(404, b'not found', 'text/plain')
+
+
+class ReplicaServer(ThreadingHTTPServer):
+    """
+    Threaded localhost server for the replica.
+
+    Use as a context manager; `search_url` is the URL to give ESSJobScraper.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, items: int = 100, latency: float = 0.0, page_size: int = PAGE_SIZE,
+                 port: int = 0, seed: int = 42):
+        super().__init__(('127.0.0.1', port), _ReplicaHandler)
+        self.latency = latency
+        self.page_size = page_size
+        self.vacancies = generate_vacancies(items, seed)
+        self.by_id = {vacancy['id']: vacancy for vacancy in self.vacancies}
+        self._thread = None
+
+    @property
+    def search_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/#/?iskalniTekst=&iskalnaLokacija=&drzava=SI,&datObj=TODAY"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the local ESS replica")
+    parser.add_argument('--items', type=int, default=100)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    with ReplicaServer(args.items, args.latency_ms / 1000, port=args.port) as server:
+        print(f"Serving {args.items} vacancies at {server.search_url}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
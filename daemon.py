@@ -0,0 +1,213 @@
+"""
+Daemon mode: poll today's ESS listing through the day.
+
+Every DAEMON_POLL_MINUTES the daemon reloads the datObj=TODAY listing in a
+browser it keeps open, opens only the vacancies it has not seen earlier
+that day, and runs them through analysis and upload right away. The day's
+stage files, search index, aggregates and archive partition are extended
+after every poll. Seen vacancies are stored per day in DAEMON_STATE_DIR,
+so a restarted daemon carries on where it stopped.
+
+    python daemon.py                 # poll forever
+    python daemon.py --interval 15   # poll every 15 minutes
+    python daemon.py --once          # a single poll, e.g. from cron
+"""
+import argparse
+import os
+import signal
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import schedule
+from dotenv import load_dotenv
+
+from jsonl_io import STAGE_PREFIXES, append_records, artifact_name, find_stage_file, read_records, stage_path
+from metrics import get_metrics, reset_metrics, write_run_metrics
+from profiling import configure_profiling
+
+load_dotenv()
+
+DAEMON_POLL_MINUTES = int(os.getenv('DAEMON_POLL_MINUTES', '30'))
+DAEMON_STATE_DIR = os.getenv('DAEMON_STATE_DIR', 'daemon_state')
+
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+class SeenVacancies:
+    """Card keys of the vacancies already processed on one day, kept in a text file."""
+
+    def __init__(self, day: str, root: str = DAEMON_STATE_DIR):
+        self.path = os.path.join(root, f"seen_{day}.txt")
+        self.keys = set()
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.keys = {line.rstrip('\n') for line in f if line.strip()}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.keys
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add_all(self, keys: Iterable[Optional[str]]) -> None:
+        new = [key for key in keys if key and key not in self.keys]
+        if not new:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.writelines(key + '\n' for key in new)
+        self.keys.update(new)
+
+
+class PollingDaemon:
+    """Scrapes and processes new vacancies of the current day on every poll."""
+
+    def __init__(self, scraper=None):
+        if scraper is None:
+            from scraper import ESSJobScraper
+            scraper = ESSJobScraper(keep_browser=True)
+        self.scraper = scraper
+        self.day: Optional[str] = None
+        self.seen: Optional[SeenVacancies] = None
+        self.analyzed_count = 0
+
+    def _start_day(self, day: str) -> None:
+        if self.day is not None:
+            # Close the previous day's metrics; spans would otherwise pile up in a long-running process
+            write_run_metrics(self.day)
+            reset_metrics()
+        self.day = day
+        self.seen = SeenVacancies(day)
+        # Counted once per day; polls then only append to the day's files
+        analyzed_file = find_stage_file('analyzed', day)
+        self.analyzed_count = sum(1 for _ in read_records(analyzed_file)) if analyzed_file else 0
+        print(f"Polling vacancies of {day} ({len(self.seen)} already seen)")
+
+    def poll(self) -> int:
+        """Scrape unseen vacancies of today and process them; returns how many were new."""
+        day = datetime.now().strftime('%Y%m%d')
+        if day != self.day:
+            self._start_day(day)
+
+        print(f"\n=== Poll at {datetime.now().strftime('%H:%M:%S')} ===")
+        try:
+            with get_metrics().span("daemon.poll") as poll_span:
+                jobs = self.scraper.scrape_jobs_with_selenium(limit=None, skip_keys=self.seen)
+                keys = list(self.scraper.scraped_keys)
+                poll_span["new_jobs"] = len(jobs)
+                if jobs and self.process(day, jobs):
+                    self.seen.add_all(keys)
+            get_metrics().increment("daemon.new_jobs", len(jobs))
+            print(f"Poll finished: {len(jobs)} new vacancies, {len(self.seen)} seen today")
+            return len(jobs)
+        except Exception as e:
+            print(f"Error during poll: {e}")
+            import traceback
+            traceback.print_exc()
+            return 0
+        finally:
+            write_run_metrics(day)
+
+    def process(self, day: str, jobs: List[Dict[str, Any]]) -> bool:
+        """
+        Run new vacancies through analysis and upload, and extend the day's artifacts.
+
+        Returns False if they could not be analyzed and raises if the upload
+        failed; either way the vacancies are not marked seen, so the next poll
+        picks them up again. The day's files are only extended after a full upload.
+        """
+        from analyze_jobs import analyze_records
+        from pipeline import cleanup_files
+        from upload_to_supabase import upload_jobs
+
+        api_key = os.getenv('GEMINI_API_KEY')
+        if not api_key:
+            print("Error: GEMINI_API_KEY environment variable not set")
+            return False
+
+        increment_file = artifact_name(f"{STAGE_PREFIXES['analyzed']}_{day}_poll{datetime.now().strftime('%H%M%S')}")
+        with get_metrics().span("stage.analyze", jobs=len(jobs)):
+            analyzed = analyze_records(jobs, increment_file, api_key, f"{STAGE_PREFIXES['raw']}_{day}")
+        cleanup_files(day)
+        if not analyzed:
+            print("No jobs were analyzed")
+            return False
+
+        try:
+            # Row ids continue after the jobs analyzed earlier today
+            with get_metrics().span("stage.upload", jobs=analyzed):
+                upload_jobs(increment_file, start_index=self.analyzed_count)
+
+            raw_file = stage_path('raw', day)
+            analyzed_file = stage_path('analyzed', day)
+            append_records(raw_file, jobs)
+            self.analyzed_count += append_records(analyzed_file, read_records(increment_file))
+        finally:
+            os.remove(increment_file)
+        print(f"Added {len(jobs)} jobs to {raw_file} and {analyzed_file} ({self.analyzed_count} analyzed today)")
+
+        self._refresh_outputs(day, analyzed_file)
+        return True
+
+    def _refresh_outputs(self, day: str, analyzed_file: str) -> None:
+        try:
+            with get_metrics().span("stage.search_index"):
+                from search_index import update_index
+                update_index([analyzed_file])
+        except Exception as e:
+            print(f"Error updating search index: {e}")
+        try:
+            with get_metrics().span("stage.aggregates"):
+                from aggregates import update_daily_aggregates
+                update_daily_aggregates(day, read_records(analyzed_file))
+        except Exception as e:
+            print(f"Error updating aggregates: {e}")
+        try:
+            with get_metrics().span("stage.archive"):
+                from archive import archive_day
+                archive_day(day, read_records(stage_path('raw', day)), read_records(analyzed_file))
+        except Exception as e:
+            print(f"Error archiving jobs: {e}")
+
+    def run_forever(self, interval_minutes: int = DAEMON_POLL_MINUTES) -> None:
+        """Poll now and then every interval_minutes until interrupted."""
+        # Stop cleanly (closing the browser) when a service manager sends SIGTERM
+        signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+        schedule.every(interval_minutes).minutes.do(self.poll)
+        print(f"Daemon started, polling every {interval_minutes} minutes")
+        try:
+            self.poll()
+            while True:
+                schedule.run_pending()
+                time.sleep(max(1, min(60, schedule.idle_seconds() or 1)))
+        except KeyboardInterrupt:
+            print("\nStopping daemon")
+        finally:
+            schedule.clear()
+            self.scraper.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Poll today's ESS vacancies and process new ones as they appear")
+    parser.add_argument('--interval', type=int, default=DAEMON_POLL_MINUTES, help="minutes between polls")
+    parser.add_argument('--once', action='store_true', help="poll once and exit")
+    args = parser.parse_args()
+
+    daemon = PollingDaemon()
+    if args.once:
+        try:
+            daemon.poll()
+        finally:
+            daemon.scraper.close()
+        return 0
+    daemon.run_forever(args.interval)
+    return 0
+
+
+if __name__ == "__main__":
+    configure_profiling()
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""
+Shared HTTP transport for the non-browser fetches.
+
+One pooled requests.Session (keep-alive, so repeat requests to a host skip
+the TCP/TLS handshake) with retries and backoff on connection errors, 429
+and 5xx. Every attempt, retries included, waits for a per-host token bucket.
+GET responses carrying an ETag or Last-Modified are kept in HTTP_CACHE_DIR
+(pruned oldest first past HTTP_CACHE_MAX_MB); the next fetch of the URL is
+sent as a conditional request and a 304 is served from the cache.
+
+    from http_transport import get_transport
+    html = get_transport().get(url).text
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import get_metrics
+
+load_dotenv()
+
+HTTP_CACHE_DIR = os.getenv('HTTP_CACHE_DIR', 'http_cache')
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '30'))
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', '3'))
+HTTP_CACHE_MAX_MB = float(os.getenv('HTTP_CACHE_MAX_MB', '200'))
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_BACKOFF = 0.5
+# Requests per second allowed to one host, and how many may go out back to back
+HTTP_RATE_PER_HOST = float(os.getenv('HTTP_RATE_PER_HOST', '2'))
+HTTP_BURST = int(os.getenv('HTTP_BURST', '4'))
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take a token, sleeping until one is available; returns the seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            # A negative balance is the caller's place in the queue
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class HttpCache:
+    """On-disk cache of GET responses with their validators, one body and one metadata file per URL."""
+
+    def __init__(self, root: str = HTTP_CACHE_DIR, max_mb: float = HTTP_CACHE_MAX_MB):
+        self.root = root
+        self.max_bytes = int(max_mb * 2 ** 20)
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _paths(self, url: str):
+        name = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.root, f"{name}.json"), os.path.join(self.root, f"{name}.body")
+
+    def load(self, url: str) -> Optional[Dict]:
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                meta['content'] = f.read()
+        except (OSError, ValueError):
+            return None
+        if meta.get('url') != url or meta.get('sha256') != hashlib.sha256(meta['content']).hexdigest():
+            return None
+        return meta
+
+    def store(self, url: str, response: requests.Response) -> None:
+        validators = {key: response.headers[key] for key in ('ETag', 'Last-Modified') if key in response.headers}
+        if not validators:
+            return
+        meta = {
+            'url': url,
+            'headers': {**validators, 'Content-Type': response.headers.get('Content-Type', '')},
+            'encoding': response.encoding,
+            'sha256': hashlib.sha256(response.content).hexdigest(),
+            'stored_at': time.time(),
+        }
+        meta_path, body_path = self._paths(url)
+        os.makedirs(self.root, exist_ok=True)
+        # Body first, then metadata; a body and metadata that don't belong together fail load()'s hash check
+        for path, data, mode in ((body_path, response.content, 'wb'),
+                                 (meta_path, json.dumps(meta).encode('utf-8'), 'wb')):
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, mode) as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        self._grew(len(response.content))
+
+    def _entries(self):
+        """(mtime, bytes, paths) of every cache entry."""
+        entries = {}
+        for name in os.listdir(self.root):
+            stem, ext = os.path.splitext(name)
+            if ext not in ('.json', '.body'):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            mtime, size, paths = entries.get(stem, (0.0, 0, []))
+            entries[stem] = (max(mtime, stat.st_mtime), size + stat.st_size, paths + [path])
+        return list(entries.values())
+
+    def _grew(self, added: int) -> None:
+        """Track the cache size and delete the least recently stored entries once it passes max_bytes."""
+        if self.max_bytes <= 0:
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += added
+            if self._size <= self.max_bytes:
+                return
+            entries = sorted(self._entries())
+            self._size = sum(size for _, size, _ in entries)
+            # Prune to 90% so the next few stores don't prune again
+            for _, size, paths in entries:
+                if self._size <= self.max_bytes * 0.9:
+                    break
+                for path in paths:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                self._size -= size
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """Seconds to wait from a Retry-After header given in seconds; None if absent or a date."""
+    try:
+        return max(0.0, float(response.headers.get('Retry-After', '')))
+    except ValueError:
+        return None
+
+
+class HttpTransport:
+    """Pooled, rate limited and cached GETs shared by every HTTP fetch of a run."""
+
+    def __init__(self, cache_dir: str = HTTP_CACHE_DIR, rate_per_host: float = HTTP_RATE_PER_HOST,
+                 burst: int = HTTP_BURST, retries: int = HTTP_RETRIES, timeout: float = HTTP_TIMEOUT):
+        self.timeout = timeout
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.cache = HttpCache(cache_dir) if cache_dir else None
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+        self.retries = retries
+        # Retries happen in get(), where each attempt takes a token; urllib3's own would bypass the bucket
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=Retry(total=0, raise_on_status=False))
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate_per_host, self.burst)
+            return self._buckets[host]
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None, use_cache: bool = True,
+            **kwargs) -> requests.Response:
+        """
+        GET a URL through the pool, the host's rate limit and the cache.
+
+        A 304 answer is returned as the cached 200 response, with
+        `from_cache` set to True on it.
+        """
+        headers = dict(headers or {})
+        cached = self.cache.load(url) if self.cache and use_cache else None
+        if cached:
+            if 'ETag' in cached['headers']:
+                headers['If-None-Match'] = cached['headers']['ETag']
+            if 'Last-Modified' in cached['headers']:
+                headers['If-Modified-Since'] = cached['headers']['Last-Modified']
+
+        timeout = kwargs.pop('timeout', self.timeout)
+        attempt = 0
+        while True:
+            waited = self._bucket(url).acquire()
+            get_metrics().increment("http.requests")
+            try:
+                with get_metrics().span("http.get", host=urlsplit(url).netloc, attempt=attempt + 1) as span:
+                    if waited:
+                        span["rate_limited_s"] = round(waited, 3)
+                    response = self.session.get(url, headers=headers, timeout=timeout, **kwargs)
+                    span["http_status"] = response.status_code
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.retries:
+                    raise
+                delay = RETRY_BACKOFF * 2 ** attempt
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    break
+                delay = _retry_after(response) or RETRY_BACKOFF * 2 ** attempt
+            attempt += 1
+            get_metrics().increment("http.retries")
+            time.sleep(delay)
+
+        response.from_cache = False
+        if response.status_code == 304 and cached:
+            get_metrics().increment("http.not_modified")
+            response.status_code = 200
+            response._content = cached['content']
+            response.headers.update(cached['headers'])
+            response.encoding = cached['encoding']
+            response.from_cache = True
+        elif response.status_code == 200 and self.cache and use_cache:
+            self.cache.store(url, response)
+        return response
+
+
+_transport: Optional[HttpTransport] = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> HttpTransport:
+    """The process-wide transport, created on first use."""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = HttpTransport()
+        return _transport
@@ -0,0 +1,218 @@
+import re
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import msgspec
+
+# The analyzer is an LLM, so scalars occasionally arrive as numbers or nulls
+Scalar = Union[str, int, float, None]
+
+
+class JobRow(msgspec.Struct, kw_only=True, gc=False):
+    """
+    One row of the `jobs` table. Well-formed input is converted in a single msgspec call;
+    msgspec parses the ISO dates itself and rejects impossible ones such as 2025-02-30.
+    """
+
+    id: str = ''
+    title: str = ''
+    company: str = ''
+    location: str = ''
+    town_location: str = ''
+    posted_date: Optional[date] = None
+    application_deadline: Optional[date] = None
+    job_url: str = ''
+    work_mode: str = ''
+    industry: str = ''
+    compensation: Dict[str, Any] = {}
+    company_info: Dict[str, Any] = {}
+    employment_type: str = ''
+    required_qualifications: List[str] = []
+    preferred_qualifications: List[str] = []
+    responsibilities: List[str] = []
+    benefits: List[str] = []
+    department_size: str = ''
+    key_skills: List[str] = []
+    languages: List[str] = []
+    application_method: str = ''
+
+
+TEXT_FIELDS = [name for name, kind in JobRow.__annotations__.items() if kind is str and name != 'id']
+LIST_FIELDS = [name for name, kind in JobRow.__annotations__.items() if kind == List[str]]
+DICT_FIELDS = [name for name, kind in JobRow.__annotations__.items() if kind == Dict[str, Any]]
+
+# Stored instead of an empty value
+PLACEHOLDERS = {
+    'title': 'Untitled Position',
+    'company': 'Unknown Company',
+    'location': 'Slovenia',
+    'work_mode': 'Not specified',
+}
+
+
+def _text(value: Scalar) -> str:
+    if value.__class__ is str:
+        return value.strip()
+    return '' if value is None else str(value)
+
+
+def _items(values: Any) -> List[str]:
+    """List items as strings; a single string (e.g. "Python, SQL") is split on newlines or commas."""
+    if isinstance(values, str):
+        separator = '\n' if '\n' in values else ','
+        return [item.strip() for item in values.split(separator) if item.strip()]
+    if not isinstance(values, list):
+        return []
+    return [item if item.__class__ is str else str(item) for item in values if item is not None]
+
+
+def _date(value: Any) -> Optional[date]:
+    """Parse YYYY-MM-DD / YYYYMMDD strings; empty, 'null' and non-strings become None."""
+    if not value or not isinstance(value, str):
+        return None
+    text = value.strip()
+    if re.fullmatch(r'\d{8}', text):
+        text = f"{text[:4]}-{text[4:6]}-{text[6:]}"
+    elif not text or text.lower() in ('null', 'none'):
+        return None
+    try:
+        return date.fromisoformat(text[:10])
+    except ValueError:
+        raise ValueError(f"Invalid date {value!r}, expected YYYY-MM-DD")
+
+
+class LooseJobRow(msgspec.Struct, kw_only=True, gc=False):
+    """Permissive variant of JobRow for rows that fail strict validation."""
+
+    title: Scalar = None
+    company: Scalar = None
+    location: Scalar = None
+    town_location: Scalar = None
+    posted_date: Any = None
+    application_deadline: Any = None
+    job_url: Scalar = None
+    work_mode: Scalar = None
+    industry: Scalar = None
+    compensation: Any = None
+    company_info: Any = None
+    employment_type: Scalar = None
+    required_qualifications: Any = None
+    preferred_qualifications: Any = None
+    responsibilities: Any = None
+    benefits: Any = None
+    department_size: Scalar = None
+    key_skills: Any = None
+    languages: Any = None
+    application_method: Scalar = None
+
+    def __post_init__(self):
+        # ValueErrors raised here are reported by msgspec as ValidationErrors for this row
+        for field in TEXT_FIELDS:
+            setattr(self, field, _text(getattr(self, field)))
+        for field in LIST_FIELDS:
+            setattr(self, field, _items(getattr(self, field)))
+        # The LLM sometimes answers "" or a sentence where an object belongs
+        for field in DICT_FIELDS:
+            if not isinstance(getattr(self, field), dict):
+                setattr(self, field, {})
+        self.posted_date = _date(self.posted_date)
+        self.application_deadline = _date(self.application_deadline)
+
+    def to_row(self) -> JobRow:
+        return JobRow(**msgspec.structs.asdict(self))
+
+
+class RowError(msgspec.Struct):
+    """Validation problems for a single input job."""
+
+    index: int
+    title: str
+    errors: List[str]
+
+
+def _field_errors(job: Any) -> List[str]:
+    """Validate each field of a rejected job on its own so every bad field is reported."""
+    if not isinstance(job, dict):
+        return [f"Expected an object, got {type(job).__name__}"]
+    errors = []
+    for field in LooseJobRow.__struct_fields__:
+        if field not in job:
+            continue
+        try:
+            msgspec.convert({field: job[field]}, LooseJobRow, strict=False)
+        except msgspec.ValidationError as e:
+            errors.append(str(e))
+    return errors or ["Invalid job record"]
+
+
+def _to_rows(jobs: List[JobRow], run_date: str, start_index: int,
+             default_posted_date: date) -> List[Dict[str, Any]]:
+    """
+    `jobs` table rows of converted jobs. Text is stripped here for both validation
+    paths, so a row comes out the same whichever path converted it.
+    """
+    asdict = msgspec.structs.asdict
+    rows = []
+    for number, job in enumerate(jobs, start_index + 1):
+        # asdict shares the converted lists and dicts; to_builtins would copy every one of them
+        row = asdict(job)
+        row['id'] = f"zavod_{run_date}_{number}"
+        for field in TEXT_FIELDS:
+            row[field] = row[field].strip()
+        for field, placeholder in PLACEHOLDERS.items():
+            if not row[field]:
+                row[field] = placeholder
+        row['posted_date'] = (row['posted_date'] or default_posted_date).isoformat()
+        if row['application_deadline'] is not None:
+            row['application_deadline'] = row['application_deadline'].isoformat()
+        rows.append(row)
+    return rows
+
+
+def _validate_chunk(jobs: List[Any], run_date: str, default_posted_date: date,
+                    start_index: int) -> Tuple[List[Dict[str, Any]], List[RowError]]:
+    try:
+        # Fast path: the whole chunk is well-formed and converted in one call
+        converted = msgspec.convert(jobs, List[JobRow])
+    except msgspec.ValidationError:
+        pass
+    else:
+        return _to_rows(converted, run_date, start_index, default_posted_date), []
+
+    rows = []
+    errors = []
+    for i, job in enumerate(jobs):
+        index = start_index + i
+        try:
+            try:
+                converted = msgspec.convert(job, JobRow)
+            except msgspec.ValidationError:
+                converted = msgspec.convert(job, LooseJobRow, strict=False).to_row()
+        except msgspec.ValidationError:
+            title = str(job.get('title') or '') if isinstance(job, dict) else ''
+            errors.append(RowError(index=index, title=title, errors=_field_errors(job)))
+            continue
+        rows.extend(_to_rows([converted], run_date, index, default_posted_date))
+    return rows, errors
+
+
+def validate_jobs(jobs: List[Any], run_date: Optional[str] = None, start_index: int = 0,
+                  chunk_size: int = 5000) -> Tuple[List[Dict[str, Any]], List[RowError]]:
+    """
+    Validate and coerce a batch of analyzed jobs into `jobs` table rows.
+
+    Returns the valid rows and a list of per-row errors. Row ids are
+    zavod_<run_date>_<n>, with n counted from start_index + 1.
+    """
+    run_date = run_date or datetime.now().strftime('%Y%m%d')
+    default_posted_date = _date(run_date)
+
+    rows = []
+    errors = []
+    for offset in range(0, len(jobs), chunk_size):
+        chunk_rows, chunk_errors = _validate_chunk(
+            jobs[offset:offset + chunk_size], run_date, default_posted_date, start_index + offset
+        )
+        rows.extend(chunk_rows)
+        errors.extend(chunk_errors)
+    return rows, errors
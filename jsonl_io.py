@@ -0,0 +1,159 @@
+import gzip
+import io
+import json
+import os
+import re
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Compression for newly written stage artifacts: "gz" (default), "zst" or "none"
+STAGE_COMPRESSION = os.getenv('STAGE_COMPRESSION', 'gz')
+
+STAGE_PREFIXES = {
+    'raw': 'detailed_jobs',
+    'analyzed': 'jobs_analyzed',
+}
+
+_EXTENSIONS = {'none': '', 'gz': '.gz', 'zst': '.zst'}
+
+
+def artifact_name(stem: str, compression: Optional[str] = None) -> str:
+    """JSONL file name for a stem, with the extension of the configured compression."""
+    compression = compression or STAGE_COMPRESSION
+    return f"{stem}.jsonl{_EXTENSIONS[compression]}"
+
+
+def stage_path(stage: str, day: str, compression: Optional[str] = None) -> str:
+    """File name of a stage artifact for the given YYYYMMDD day, e.g. detailed_jobs_20250404.jsonl.gz."""
+    return artifact_name(f"{STAGE_PREFIXES[stage]}_{day}", compression)
+
+
+def find_stage_file(stage: str, day: str, directory: str = '.') -> Optional[str]:
+    """Return an existing artifact for the stage and day, including legacy pretty-printed .json files."""
+    prefix = f"{STAGE_PREFIXES[stage]}_{day}"
+    candidates = [stage_path(stage, day, compression) for compression in (STAGE_COMPRESSION, 'gz', 'zst', 'none')]
+    candidates.append(f"{prefix}.json")
+    for name in candidates:
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def find_stage_files(stage: str, directory: str = '.') -> List[str]:
+    """
+    The finished day artifact of a stage for every day present, one file per day (as find_stage_file).
+
+    Temporary files of an unfinished write, daemon increments and shard files are not matched.
+    """
+    pattern = re.compile(rf"^{STAGE_PREFIXES[stage]}_(\d{{8}})\.(json|jsonl(\.gz|\.zst)?)$")
+    days = sorted({match.group(1) for match in map(pattern.match, os.listdir(directory)) if match})
+    return [find_stage_file(stage, day, directory) for day in days]
+
+
+def _open_text(path: str, mode: str):
+    """Open an artifact for reading ('r'), writing ('w') or appending ('a') text."""
+    if path.endswith('.gz'):
+        # Appending adds a gzip member; readers decompress concatenated members as one stream
+        return gzip.open(path, mode + 't', encoding='utf-8', compresslevel=6)
+    if path.endswith('.zst'):
+        import zstandard
+        if mode == 'r':
+            stream = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True,
+                                                                  read_across_frames=True)
+        else:
+            stream = zstandard.ZstdCompressor(level=6).stream_writer(open(path, mode + 'b'), closefd=True)
+        return io.TextIOWrapper(stream, encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream records from a stage artifact one at a time.
+
+    Reads newline-delimited JSON (optionally .gz/.zst compressed). Legacy
+    .json files holding a single array are still accepted, but are loaded whole.
+    """
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        yield from (records if isinstance(records, list) else [])
+        return
+
+    with _open_text(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+class JsonlWriter:
+    """Incrementally write records to a JSONL artifact; the file appears atomically on close."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._tmp_path = path + '.tmp' + os.path.splitext(path)[1]
+        self._file = _open_text(self._tmp_path, 'w')
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write('\n')
+        self.count += 1
+
+    def write_all(self, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            self.write(record)
+
+    def close(self) -> None:
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self) -> None:
+        self._file.close()
+        os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_records(path: str, records: Iterable[Dict[str, Any]]) -> int:
+    """Write all records to a JSONL artifact and return how many were written."""
+    with JsonlWriter(path) as writer:
+        writer.write_all(records)
+    return writer.count
+
+
+def append_records(path: str, records: Iterable[Dict[str, Any]]) -> int:
+    """
+    Add records to the end of an artifact, creating it if needed; returns how many were added.
+
+    Existing content is not rewritten: compressed files get a new gzip member or
+    zstd frame. Unlike write_records, an append interrupted halfway can leave a
+    partial last record. Legacy .json files cannot be appended to.
+    """
+    if path.endswith('.json'):
+        raise ValueError(f"Cannot append to legacy JSON file {path}")
+    count = 0
+    with _open_text(path, 'a') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write('\n')
+            count += 1
+    return count
+
+
+def batched(records: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Yield lists of up to `size` records without materializing the whole stream."""
+    iterator = iter(records)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
@@ -0,0 +1,153 @@
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+METRICS_DIR = os.getenv('METRICS_DIR', '.')
+METRIC_PREFIX = 'ess_scraper'
+
+
+def _quantile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def _label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class RunMetrics:
+    """Timing spans and counters collected during one pipeline run."""
+
+    def __init__(self, run_id: Optional[str] = None):
+        # Start time and process id, so runs of the same second (e.g. parallel shards) differ too
+        self.run_id = run_id or f"{datetime.now().strftime('%H%M%S')}_{os.getpid()}"
+        self.started_at = time.time()
+        self.spans: List[Dict[str, Any]] = []
+        self.counters: Dict[str, float] = defaultdict(float)
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """
+        Time a block of code as a span.
+
+        Yields the span's attribute dict so the block can add details such as
+        token counts; the span is recorded with status "error" if the block raises.
+        """
+        attrs = dict(attrs)
+        started = time.perf_counter()
+        try:
+            yield attrs
+        except BaseException:
+            attrs.setdefault('status', 'error')
+            raise
+        finally:
+            attrs.setdefault('status', 'ok')
+            self.record(name, time.perf_counter() - started, **attrs)
+
+    def record(self, name: str, duration: float, **attrs) -> None:
+        """Record a span whose duration was measured by the caller."""
+        self.spans.append({'name': name, 'duration': round(duration, 6), 'at': round(time.time(), 3), **attrs})
+
+    def increment(self, name: str, value: float = 1) -> None:
+        self.counters[name] += value
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Count, total, p50, p95 and max duration per span name."""
+        durations = defaultdict(list)
+        errors = defaultdict(int)
+        for span in self.spans:
+            durations[span['name']].append(span['duration'])
+            if span.get('status') == 'error':
+                errors[span['name']] += 1
+        summary = {}
+        for name, values in durations.items():
+            values.sort()
+            summary[name] = {
+                'count': len(values),
+                'errors': errors[name],
+                'total': round(sum(values), 6),
+                'p50': _quantile(values, 0.5),
+                'p95': _quantile(values, 0.95),
+                'max': values[-1],
+            }
+        return summary
+
+    def write_json(self, path: str) -> None:
+        data = {
+            'run_id': self.run_id,
+            'started_at': self.started_at,
+            'finished_at': time.time(),
+            'summary': self.summary(),
+            'counters': dict(self.counters),
+            'spans': self.spans,
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+
+    def write_prometheus(self, path: str) -> None:
+        """Write a node_exporter textfile-collector file; replaced atomically."""
+        lines = [
+            f"# HELP {METRIC_PREFIX}_span_duration_seconds Duration of pipeline spans.",
+            f"# TYPE {METRIC_PREFIX}_span_duration_seconds summary",
+        ]
+        for name, stats in sorted(self.summary().items()):
+            label = f'span="{_label(name)}"'
+            lines.append(f'{METRIC_PREFIX}_span_duration_seconds{{{label},quantile="0.5"}} {stats["p50"]}')
+            lines.append(f'{METRIC_PREFIX}_span_duration_seconds{{{label},quantile="0.95"}} {stats["p95"]}')
+            lines.append(f'{METRIC_PREFIX}_span_duration_seconds_sum{{{label}}} {stats["total"]}')
+            lines.append(f'{METRIC_PREFIX}_span_duration_seconds_count{{{label}}} {stats["count"]}')
+        lines.append(f"# HELP {METRIC_PREFIX}_span_errors_total Spans that ended with an error.")
+        lines.append(f"# TYPE {METRIC_PREFIX}_span_errors_total counter")
+        for name, stats in sorted(self.summary().items()):
+            lines.append(f'{METRIC_PREFIX}_span_errors_total{{span="{_label(name)}"}} {stats["errors"]}')
+        lines.append(f"# HELP {METRIC_PREFIX}_events_total Pipeline event counters.")
+        lines.append(f"# TYPE {METRIC_PREFIX}_events_total counter")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f'{METRIC_PREFIX}_events_total{{name="{_label(name)}"}} {value}')
+        lines.append(f"# HELP {METRIC_PREFIX}_last_run_timestamp_seconds End time of the last run.")
+        lines.append(f"# TYPE {METRIC_PREFIX}_last_run_timestamp_seconds gauge")
+        lines.append(f"{METRIC_PREFIX}_last_run_timestamp_seconds {time.time():.3f}")
+
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, path)
+
+
+_current = RunMetrics()
+
+
+def get_metrics() -> RunMetrics:
+    """The metrics collector of the current run."""
+    return _current
+
+
+def reset_metrics(run_id: Optional[str] = None) -> RunMetrics:
+    """Start a fresh collector, e.g. at the beginning of a pipeline run."""
+    global _current
+    _current = RunMetrics(run_id)
+    return _current
+
+
+def write_run_metrics(day: Optional[str] = None, directory: str = METRICS_DIR) -> None:
+    """
+    Write metrics_<day>_<run_id>.json and metrics_<day>.prom for the current run.
+
+    Every run keeps its own JSON file; the textfile keeps a stable name for the
+    Prometheus collector, so it shows the day's latest run.
+    """
+    day = day or datetime.now().strftime('%Y%m%d')
+    os.makedirs(directory, exist_ok=True)
+    json_path = os.path.join(directory, f"metrics_{day}_{_current.run_id}.json")
+    try:
+        _current.write_json(json_path)
+        _current.write_prometheus(os.path.join(directory, f"metrics_{day}.prom"))
+        print(f"Saved run metrics to {json_path}")
+    except Exception as e:
+        print(f"Error writing run metrics: {e}")
@@ -0,0 +1,162 @@
+"""
+Capture the ESS app's JSON responses from Chrome's performance log.
+
+The Angular app loads the vacancy list and every vacancy's details as JSON.
+With the `goog:loggingPrefs` performance log enabled, NetworkCapture picks
+up those responses through CDP `Network.getResponseBody`, finds the vacancy
+objects in them and maps their fields to the scraper's job_detail keys.
+
+The ESS API is not documented, so fields are matched by a list of likely key
+names (Slovenian and English) rather than a fixed schema. Anything that
+cannot be mapped leaves the scraper to fall back to reading the page.
+"""
+import base64
+import json
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from bs4 import BeautifulSoup
+
+# job_detail field -> candidate payload keys, compared after normalize_key()
+FIELD_ALIASES = {
+    'job_id': ('id', 'idpdm', 'idvacancy', 'idprostegadelovnegamesta', 'sifra', 'sifrapdm', 'vacancyid'),
+    'title': ('naziv', 'nazivdelovnegamesta', 'nazivdm', 'delovnomesto', 'poklic', 'title', 'name'),
+    'company': ('delodajalec', 'nazivdelodajalca', 'organizacija', 'podjetje', 'employer', 'company'),
+    'location': ('kraj', 'krajdela', 'krajopravljanjadela', 'lokacija', 'location', 'town', 'city'),
+    'region': ('regija', 'region', 'obmocje', 'upravnaenota'),
+    'description': ('opis', 'opisdela', 'opisdelovnegamesta', 'opisdelainnalog', 'description'),
+    'requirements': ('pricakujemo', 'zahteve', 'pogoji', 'requirements'),
+    'benefits': ('nudimo', 'ugodnosti', 'benefits'),
+    'application_method': ('nacinprijave', 'prijava', 'applicationmethod'),
+    'contact_info': ('kontakt', 'kontaktzakandidata', 'kontaktnaoseba', 'contact'),
+    'posted_date': ('datumobjave', 'objavljeno', 'datumobjaveod', 'posteddate', 'published'),
+    'application_deadline': ('rokprijave', 'rokzaprijavo', 'prijavedo', 'datumobjavedo', 'deadline'),
+}
+
+LIST_FIELDS = ('requirements', 'benefits')
+
+# A vacancy's detail payload has at least one of these besides its id and title
+DETAIL_FIELDS = ('description', 'requirements', 'benefits', 'application_method', 'contact_info')
+
+_ALIAS_TO_FIELD = {alias: field for field, aliases in FIELD_ALIASES.items() for alias in aliases}
+
+_NAME_KEYS = ('naziv', 'ime', 'name', 'title', 'opis', 'vrednost', 'value', 'text')
+
+
+def normalize_key(key: str) -> str:
+    """Lowercase a payload key and drop separators and diacritics: 'datum_Objave' -> 'datumobjave'."""
+    key = key.lower().translate(str.maketrans('čšžćđ', 'csscd'))
+    return re.sub(r'[^a-z0-9]', '', key)
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, dict):
+        # Nested lookups such as {"id": 61, "naziv": "Ljubljana"}: keep the name
+        for key, item in value.items():
+            if normalize_key(key) in _NAME_KEYS and isinstance(item, str):
+                return _text(item)
+        return ' '.join(_text(item) for item in value.values() if isinstance(item, str))
+    text = str(value).strip()
+    if '<' in text and '>' in text:
+        text = BeautifulSoup(text, 'html.parser').get_text('\n', strip=True)
+    return text
+
+
+def _text_list(value: Any) -> List[str]:
+    if isinstance(value, list):
+        items = [_text(item) for item in value]
+    else:
+        items = _text(value).split('\n')
+    return [item.strip(' -•\t') for item in items if item and item.strip(' -•\t')]
+
+
+def map_vacancy(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a vacancy payload to job_detail fields; unknown keys are ignored."""
+    detail = {}
+    for key, value in record.items():
+        field = _ALIAS_TO_FIELD.get(normalize_key(key))
+        if field is None or field in detail or value in (None, '', []):
+            continue
+        detail[field] = _text_list(value) if field in LIST_FIELDS else _text(value)
+    return detail
+
+
+def find_vacancies(payload: Any) -> Iterator[Dict[str, Any]]:
+    """Yield every object in a JSON payload that looks like a vacancy (has an id and a title)."""
+    if isinstance(payload, list):
+        for item in payload:
+            yield from find_vacancies(item)
+    elif isinstance(payload, dict):
+        fields = {_ALIAS_TO_FIELD.get(normalize_key(key)) for key in payload}
+        if 'job_id' in fields and 'title' in fields:
+            yield payload
+            return
+        for value in payload.values():
+            if isinstance(value, (dict, list)):
+                yield from find_vacancies(value)
+
+
+class NetworkCapture:
+    """Collects vacancy payloads from one driver's performance log."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.vacancies: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, str] = {}
+        self.responses = 0
+
+    def drain(self) -> int:
+        """Read new performance log entries and store the vacancies in finished JSON responses."""
+        found = 0
+        for entry in self.driver.get_log('performance'):
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            method = message.get('method')
+            params = message.get('params', {})
+            if method == 'Network.responseReceived':
+                response = params.get('response', {})
+                if 'json' in response.get('mimeType', ''):
+                    self._pending[params['requestId']] = response.get('url', '')
+            elif method == 'Network.loadingFinished' and params.get('requestId') in self._pending:
+                self._pending.pop(params['requestId'])
+                found += self._read_body(params['requestId'])
+        return found
+
+    def _read_body(self, request_id: str) -> int:
+        try:
+            body = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+            text = body.get('body', '')
+            if body.get('base64Encoded'):
+                text = base64.b64decode(text).decode('utf-8')
+            payload = json.loads(text)
+        except Exception:
+            return 0
+        self.responses += 1
+
+        found = 0
+        for record in find_vacancies(payload):
+            detail = map_vacancy(record)
+            job_id = str(detail.get('job_id', ''))
+            if not job_id:
+                continue
+            # Detail responses add to what the listing already provided
+            self.vacancies.setdefault(job_id, {}).update(detail)
+            found += 1
+        return found
+
+    def wait_for(self, job_id: str, timeout: float = 10.0) -> Optional[Dict[str, Any]]:
+        """Wait until the detail payload of a vacancy has been captured; None on timeout."""
+        deadline = time.monotonic() + timeout
+        while True:
+            self.drain()
+            detail = self.vacancies.get(str(job_id))
+            if detail and any(field in detail for field in DETAIL_FIELDS):
+                return self.vacancies.pop(str(job_id))
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.2)
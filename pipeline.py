@@ -0,0 +1,317 @@
+"""
+Stage-aware, resumable pipeline runner.
+
+Runs scrape -> analyze -> upload -> archive -> search_index -> aggregates
+for one day and records every stage in runs/<YYYYMMDD>/manifest.json: its
+status, the sha256 of the artifacts it read and wrote, and its duration.
+A stage whose inputs and outputs still match the manifest is skipped, so
+re-running after a failed upload only redoes the upload.
+
+    python pipeline.py                      # run or resume today's pipeline
+    python pipeline.py --from analyze       # redo analyze and everything after it
+    python pipeline.py --only upload --date 20250404
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from jsonl_io import STAGE_PREFIXES, find_stage_file, read_records, stage_path, write_records
+from metrics import get_metrics, write_run_metrics
+from profiling import configure_profiling, profile_stage
+from shards import find_shard_files, merge_shards, missing_shards
+
+load_dotenv()
+
+RUNS_DIR = os.getenv('RUNS_DIR', 'runs')
+
+STAGES = ('scrape', 'analyze', 'upload', 'archive', 'search_index', 'aggregates')
+
+# Stages whose outputs a stage reads; it is not run if one of them failed in this run
+DEPENDS_ON = {
+    'scrape': (),
+    'analyze': ('scrape',),
+    'upload': ('analyze',),
+    'archive': ('scrape', 'analyze'),
+    'search_index': ('analyze',),
+    'aggregates': ('analyze',),
+}
+
+# Stages whose existing output file is adopted when the manifest has no entry for them
+ADOPTED_OUTPUTS = {'scrape': 'raw', 'analyze': 'analyzed'}
+
+_hash_cache: Dict[Tuple[str, float, int], str] = {}
+
+
+def file_sha256(path: str) -> str:
+    """Content hash of a file; cached per (path, mtime, size) within the process."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime, stat.st_size)
+    if key not in _hash_cache:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        _hash_cache[key] = digest.hexdigest()
+    return _hash_cache[key]
+
+
+def _hashes(paths: List[str]) -> Dict[str, str]:
+    return {path: file_sha256(path) for path in paths if os.path.exists(path)}
+
+
+class RunManifest:
+    """The record of one day's pipeline run, kept in runs/<day>/manifest.json."""
+
+    def __init__(self, day: str, root: str = RUNS_DIR):
+        self.day = day
+        self.path = os.path.join(root, day, 'manifest.json')
+        self.data: Dict[str, Any] = {'date': day, 'stages': {}}
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+
+    def stage(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.data['stages'].get(name)
+
+    def is_current(self, name: str, inputs: List[str]) -> bool:
+        """True if the stage succeeded before on the same inputs and its outputs are unchanged."""
+        entry = self.stage(name)
+        if not entry or entry.get('status') != 'ok':
+            return False
+        if entry.get('inputs', {}) != _hashes(inputs):
+            return False
+        for path, digest in entry.get('outputs', {}).items():
+            if not os.path.exists(path) or file_sha256(path) != digest:
+                return False
+        return True
+
+    def record(self, name: str, status: str, inputs: List[str], outputs: List[str],
+               duration: float, error: Optional[str] = None, **details) -> None:
+        previous = self.stage(name) or {}
+        self.data['stages'][name] = {
+            'status': status,
+            'inputs': _hashes(inputs),
+            'outputs': _hashes(outputs),
+            'duration': round(duration, 3),
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+            'attempts': previous.get('attempts', 0) + 1,
+            'error': error,
+            **details,
+        }
+        self.save()
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def cleanup_files(day: str) -> None:
+    """Delete the analyzer's intermediate chunk files and legacy batch files of a day."""
+    patterns = [
+        f"{STAGE_PREFIXES['raw']}_{day}_chunk*.jsonl",
+        f"jobs_raw_{day}_batch*.json",
+        f"jobs_raw_{day}_batch*_chunk*.jsonl",
+    ]
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            try:
+                os.remove(path)
+                print(f"Deleted: {path}")
+            except Exception as e:
+                print(f"Error deleting {path}: {e}")
+
+
+def _raw_file(day: str) -> str:
+    return os.path.normpath(find_stage_file('raw', day) or stage_path('raw', day))
+
+
+def _analyzed_file(day: str) -> str:
+    return os.path.normpath(find_stage_file('analyzed', day) or stage_path('analyzed', day))
+
+
+def run_scrape(day: str) -> Tuple[List[str], Dict[str, Any]]:
+    shard_files = find_shard_files(day)
+    if shard_files:
+        # The shards were scraped by separate runners; combine them instead of scraping
+        missing = [f"{index}/{count}" for index, count in missing_shards(shard_files)]
+        return [merge_shards(day, shard_files)], {'shards': len(shard_files), 'missing_shards': missing}
+
+    from sources import JOB_SOURCES, run_sources
+    if day != datetime.now().strftime('%Y%m%d'):
+        raise RuntimeError(f"Only today's vacancies are scraped here, use backfill.py --from {day} for {day}")
+    jobs = run_sources(JOB_SOURCES.split(','))
+    if not jobs:
+        raise RuntimeError("No job data found")
+    raw_file = stage_path('raw', day)
+    saved = write_records(raw_file, jobs)
+    print(f"Saved {saved} detailed job listings to {raw_file}")
+    return [raw_file], {'records': saved, 'sources': JOB_SOURCES}
+
+
+def run_analyze(day: str) -> Tuple[List[str], Dict[str, Any]]:
+    from analyze_jobs import analyze_records
+    api_key = os.getenv('GEMINI_API_KEY')
+    if not api_key:
+        raise RuntimeError("GEMINI_API_KEY environment variable not set")
+    analyzed_file = stage_path('analyzed', day)
+    count = analyze_records(read_records(_raw_file(day)), analyzed_file, api_key, f"{STAGE_PREFIXES['raw']}_{day}")
+    if not count:
+        raise RuntimeError("No jobs were analyzed")
+    cleanup_files(day)
+    return [analyzed_file], {'records': count}
+
+
+def run_upload(day: str) -> Tuple[List[str], Dict[str, Any]]:
+    from upload_to_supabase import upload_jobs
+    # Raises on a failed or partial upload, so the stage is recorded as an error and retried next run
+    return [], {'records': upload_jobs(_analyzed_file(day))}
+
+
+def run_archive(day: str) -> Tuple[List[str], Dict[str, Any]]:
+    from archive import write_partition
+    outputs = [
+        write_partition('raw', day, read_records(_raw_file(day))),
+        write_partition('analyzed', day, read_records(_analyzed_file(day))),
+    ]
+    return [path for path in outputs if path], {}
+
+
+def run_search_index(day: str) -> Tuple[List[str], Dict[str, Any]]:
+    from search_index import update_index
+    return [], {'records': update_index([_analyzed_file(day)])}
+
+
+def run_aggregates(day: str) -> Tuple[List[str], Dict[str, Any]]:
+    from aggregates import update_daily_aggregates
+    return [update_daily_aggregates(day, read_records(_analyzed_file(day)))], {}
+
+
+STAGE_RUNNERS: Dict[str, Callable[[str], Tuple[List[str], Dict[str, Any]]]] = {
+    'scrape': run_scrape,
+    'analyze': run_analyze,
+    'upload': run_upload,
+    'archive': run_archive,
+    'search_index': run_search_index,
+    'aggregates': run_aggregates,
+}
+
+
+def stage_inputs(name: str, day: str) -> List[str]:
+    """Artifacts a stage reads, in the order they are hashed into the manifest."""
+    inputs = {
+        'scrape': find_shard_files(day),
+        'analyze': [_raw_file(day)],
+        'upload': [_analyzed_file(day)],
+        'archive': [_raw_file(day), _analyzed_file(day)],
+        'search_index': [_analyzed_file(day)],
+        'aggregates': [_analyzed_file(day)],
+    }
+    return inputs[name]
+
+
+def run_pipeline(day: Optional[str] = None, start: Optional[str] = None, only: Optional[str] = None,
+                 force: bool = False) -> int:
+    """
+    Run the pipeline for a day, skipping stages that are already up to date.
+
+    `start` forces that stage and every later one to run; `only` forces just
+    one stage. Returns 0 if every selected stage succeeded or was skipped.
+    """
+    day = day or datetime.now().strftime('%Y%m%d')
+    manifest = RunManifest(day)
+    if only:
+        selected = [only]
+    elif start:
+        selected = list(STAGES[STAGES.index(start):])
+    else:
+        selected = list(STAGES)
+    forced = force or bool(only or start)
+
+    print(f"=== Pipeline for {day}: {', '.join(selected)} ===")
+    failed = set()
+    for name in selected:
+        blocked = [dependency for dependency in DEPENDS_ON[name] if dependency in failed]
+        if blocked:
+            print(f"\n--- {name}: not run, {', '.join(blocked)} failed ---")
+            failed.add(name)
+            continue
+
+        inputs = stage_inputs(name, day)
+        missing = [path for path in inputs if not os.path.exists(path)]
+        if missing:
+            print(f"\n--- {name}: missing input {', '.join(missing)} ---")
+            manifest.record(name, 'error', inputs, [], 0.0, error=f"missing input: {', '.join(missing)}")
+            failed.add(name)
+            continue
+
+        if not forced and manifest.is_current(name, inputs):
+            print(f"\n--- {name}: up to date, skipping ---")
+            get_metrics().increment("pipeline.stages_skipped")
+            continue
+
+        # Raw and analyzed files written before the manifest existed (or by another tool, such as
+        # backfill.py or the daemon) are adopted rather than scraped or paid for with Gemini again
+        adopted = ADOPTED_OUTPUTS.get(name)
+        if (adopted and not forced and manifest.stage(name) is None and find_stage_file(adopted, day)
+                and not (name == 'scrape' and inputs)):
+            output = os.path.normpath(find_stage_file(adopted, day))
+            print(f"\n--- {name}: adopting existing {output} ---")
+            manifest.record(name, 'ok', inputs, [output], 0.0, adopted=True)
+            continue
+
+        print(f"\n--- {name} ---")
+        started = time.perf_counter()
+        try:
+            with get_metrics().span(f"stage.{name}"), profile_stage(name):
+                outputs, details = STAGE_RUNNERS[name](day)
+        except Exception as e:
+            print(f"Error in stage {name}: {e}")
+            import traceback
+            traceback.print_exc()
+            manifest.record(name, 'error', inputs, [], time.perf_counter() - started, error=str(e))
+            failed.add(name)
+            continue
+        manifest.record(name, 'ok', inputs, outputs, time.perf_counter() - started, **details)
+
+    print(f"\nManifest saved to {manifest.path}")
+    if failed:
+        print(f"Failed stages: {', '.join(name for name in selected if name in failed)}")
+        return 1
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run or resume the daily scrape/analyze/upload pipeline")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--from', dest='start', choices=STAGES, help="redo this stage and every later one")
+    group.add_argument('--only', choices=STAGES, help="redo only this stage")
+    parser.add_argument('--date', help="run date as YYYYMMDD (default today)")
+    parser.add_argument('--force', action='store_true', help="run every selected stage even if up to date")
+    args = parser.parse_args(argv)
+
+    if args.date:
+        try:
+            datetime.strptime(args.date, '%Y%m%d')
+        except ValueError:
+            parser.error(f"--date must be YYYYMMDD, got {args.date}")
+    return run_pipeline(args.date, args.start, args.only, args.force)
+
+
+if __name__ == "__main__":
+    configure_profiling()
+    started = time.perf_counter()
+    exit_code = main()
+    get_metrics().record("pipeline.total", time.perf_counter() - started, exit_code=exit_code)
+    write_run_metrics()
+    sys.exit(exit_code)
@@ -0,0 +1,230 @@
+"""
+Opt-in CPU and memory profiling of pipeline stages.
+
+Enabled with `--profile` (cProfile and tracemalloc), `--profile=cpu` or
+`--profile=mem` on main.py and the stage scripts, or with the PROFILE
+environment variable for scheduled runs. Each stage wrapped in
+profile_stage() then writes to PROFILE_DIR:
+
+- <day>_<stage>.prof        cProfile stats (snakeviz, pstats)
+- <day>_<stage>_cpu.txt     top functions by cumulative time
+- <day>_<stage>_alloc.txt   top allocations made during the stage
+- <day>_markers.jsonl       stage start/end markers
+
+py-spy has no marker API, so while a stage runs the current thread is
+renamed to "<name> [<stage>]"; `py-spy dump` shows the stage next to the
+stack, and the markers file lines up with the timestamps of `py-spy record`.
+
+cProfile only sees the thread it was enabled in. Work a stage hands to
+worker threads runs inside profile_thread(), whose profiles are merged into
+the stage's report.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional, Set
+
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+PROFILE_TOP = int(os.getenv('PROFILE_TOP', '30'))
+TRACEMALLOC_FRAMES = int(os.getenv('PROFILE_TRACEMALLOC_FRAMES', '5'))
+
+MODES = ('cpu', 'mem')
+
+_modes: Set[str] = set()
+_cpu_active = False
+# Profiles of worker threads, merged into the running stage's CPU report
+_thread_profilers: List[cProfile.Profile] = []
+_thread_profilers_lock = threading.Lock()
+
+
+def _parse_modes(value: str) -> Set[str]:
+    value = value.strip().lower()
+    if value in ('', '1', 'true', 'yes', 'all'):
+        return set(MODES)
+    if value in ('0', 'false', 'no', 'off'):
+        return set()
+    modes = {mode.strip() for mode in value.split(',') if mode.strip()}
+    unknown = modes - set(MODES)
+    if unknown:
+        raise ValueError(f"Unknown profiling mode(s): {', '.join(sorted(unknown))} (use cpu, mem)")
+    return modes
+
+
+def enable_profiling(modes: str = 'cpu,mem') -> None:
+    """Turn profiling on for the rest of the process."""
+    _modes.clear()
+    _modes.update(_parse_modes(modes))
+
+
+def profiling_enabled() -> bool:
+    return bool(_modes)
+
+
+def configure_profiling(argv: Optional[List[str]] = None) -> None:
+    """
+    Enable profiling from a `--profile[=cpu,mem]` argument or the PROFILE env var.
+
+    The flag is removed from argv (sys.argv by default) so the scripts' own
+    argument handling is unchanged.
+    """
+    argv = sys.argv if argv is None else argv
+    setting = os.getenv('PROFILE')
+    for arg in list(argv[1:]):
+        if arg == '--profile' or arg.startswith('--profile='):
+            setting = arg.partition('=')[2] or 'all'
+            argv.remove(arg)
+    if setting:
+        try:
+            enable_profiling(setting)
+        except ValueError as e:
+            print(f"Error: {e}")
+        if _modes:
+            print(f"Profiling enabled ({', '.join(sorted(_modes))}), writing to {PROFILE_DIR}")
+
+
+def _marker(day: str, stage: str, event: str) -> None:
+    marker = {
+        'stage': stage,
+        'event': event,
+        'time': round(time.time(), 6),
+        'pid': os.getpid(),
+        'thread': threading.get_ident(),
+    }
+    with open(os.path.join(PROFILE_DIR, f"{day}_markers.jsonl"), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(marker) + '\n')
+
+
+def _write_cpu_report(profiler: cProfile.Profile, base: str) -> None:
+    report = io.StringIO()
+    stats = pstats.Stats(profiler, stream=report)
+    with _thread_profilers_lock:
+        thread_profilers = _thread_profilers[:]
+        _thread_profilers.clear()
+    for thread_profiler in thread_profilers:
+        stats.add(thread_profiler)
+    stats.dump_stats(base + '.prof')
+    stats.sort_stats('cumulative').print_stats(PROFILE_TOP)
+    with open(base + '_cpu.txt', 'w', encoding='utf-8') as f:
+        f.write(report.getvalue())
+    print(f"Saved CPU profile to {base}.prof")
+
+
+def _write_alloc_report(before: tracemalloc.Snapshot, base: str, stage: str, peak: Optional[int]) -> None:
+    ignore = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        tracemalloc.Filter(False, '<unknown>'),
+    )
+    after = tracemalloc.take_snapshot().filter_traces(ignore)
+    before = before.filter_traces(ignore)
+
+    current, _ = tracemalloc.get_traced_memory()
+    lines = [f"Allocations of stage {stage}", f"Traced memory at end: {current / 2 ** 20:.1f} MiB"]
+    if peak is not None:
+        lines.append(f"Peak traced memory: {peak / 2 ** 20:.1f} MiB")
+
+    differences = after.compare_to(before, 'lineno')
+    lines.append(f"\nTop {PROFILE_TOP} lines by memory still allocated at the end of the stage:")
+    lines.extend(str(stat) for stat in differences[:PROFILE_TOP])
+
+    lines.append("\nTracebacks of the 5 largest allocation sites:")
+    for stat in after.compare_to(before, 'traceback')[:5]:
+        lines.append(f"\n{stat.size_diff / 1024:.1f} KiB in {stat.count_diff} blocks")
+        lines.extend(stat.traceback.format())
+
+    with open(base + '_alloc.txt', 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    print(f"Saved allocation report to {base}_alloc.txt")
+
+
+@contextmanager
+def profile_stage(stage: str):
+    """
+    Profile a pipeline stage when profiling is enabled; a no-op otherwise.
+
+    Stages may nest (the analyzer's own stage runs inside main.py); only the
+    outermost stage gets a cProfile, since only one profiler can be active.
+    """
+    if not _modes:
+        yield
+        return
+
+    global _cpu_active
+    day = datetime.now().strftime('%Y%m%d')
+    base = os.path.join(PROFILE_DIR, f"{day}_{stage}")
+    thread = threading.current_thread()
+    thread_name = thread.name
+    profiler = None
+    before = None
+    started_tracing = False
+
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        _marker(day, stage, 'start')
+        thread.name = f"{thread_name} [{stage}]"
+        if 'mem' in _modes:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                started_tracing = True
+            before = tracemalloc.take_snapshot()
+        if 'cpu' in _modes and not _cpu_active:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            _cpu_active = True
+    except Exception as e:
+        print(f"Error starting profiler for {stage}: {e}")
+
+    try:
+        yield
+    finally:
+        try:
+            if profiler is not None:
+                profiler.disable()
+                _cpu_active = False
+                _write_cpu_report(profiler, base)
+            if before is not None:
+                # The peak is only meaningful for the stage that started tracing
+                peak = tracemalloc.get_traced_memory()[1] if started_tracing else None
+                _write_alloc_report(before, base, stage, peak)
+            _marker(day, stage, 'end')
+        except Exception as e:
+            print(f"Error writing profile for {stage}: {e}")
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+            thread.name = thread_name
+
+
+@contextmanager
+def profile_thread():
+    """
+    Profile a worker thread's share of the running stage; a no-op unless the
+    stage is being CPU profiled.
+
+    Python 3.12+ allows only one active cProfile, which then covers every
+    thread already, so this is a no-op there as well.
+    """
+    if not _cpu_active or threading.current_thread() is threading.main_thread():
+        yield
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        yield
+        return
+    try:
+        yield
+    finally:
+        profiler.disable()
+        with _thread_profilers_lock:
+            _thread_profilers.append(profiler)
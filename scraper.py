@@ -1,25 +1,84 @@
-import requests
 from bs4 import BeautifulSoup
 import json
-from datetime import datetime
+from datetime import date, datetime
 import os
-from typing import List, Dict
+from typing import Dict, List, Optional, Tuple
 import time
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import InvalidSessionIdException, WebDriverException
 import re
 import sys
+from urllib.parse import quote
 import selenium
+import argparse
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
+from jsonl_io import stage_path, write_records
+from metrics import get_metrics, write_run_metrics
+from profiling import configure_profiling, profile_stage
+from shards import in_shard, parse_shard, shard_path
+from network_capture import NetworkCapture
+from http_transport import get_transport
+
+ESS_SEARCH_PAGE = "https://www.ess.gov.si/iskalci-zaposlitve/iskanje-zaposlitve/iskanje-dela/"
+
+# Search parameter selecting the vacancies published on one date (formatted with date=datetime.date)
+ESS_DATE_FILTER = os.getenv('ESS_DATE_FILTER', 'datObj={date:%d.%m.%Y}')
+
+
+def search_url(day: Optional[date] = None, location: str = '', country: str = 'SI') -> str:
+    """ESS search URL for the vacancies published on day (default today), optionally in one location."""
+    date_filter = 'datObj=TODAY' if day is None else ESS_DATE_FILTER.format(date=day)
+    countries = country if country.endswith(',') else country + ','
+    return f"{ESS_SEARCH_PAGE}#/?iskalniTekst=&iskalnaLokacija={quote(location)}&drzava={countries}&{date_filter}"
+
+
+ESS_SEARCH_URL = search_url()
+
+# Restart Chrome every N vacancies, or once the page's JS heap passes this many MB (0 disables)
+SCRAPER_RECYCLE_EVERY = int(os.getenv('SCRAPER_RECYCLE_EVERY', '150'))
+SCRAPER_MAX_HEAP_MB = float(os.getenv('SCRAPER_MAX_HEAP_MB', '512'))
+
+# Passes over the failed vacancies at the end of a run
+SCRAPER_RETRY_ATTEMPTS = int(os.getenv('SCRAPER_RETRY_ATTEMPTS', '2'))
+
+# "dom" reads vacancy details from the modal; "network" takes them from the app's JSON responses
+SCRAPER_EXTRACTION = os.getenv('SCRAPER_EXTRACTION', 'dom')
+
+SESSION_LOST_MARKERS = ('invalid session id', 'chrome not reachable', 'tab crashed', 'session deleted', 'target window already closed')
+
+
+def _session_lost(error: Exception) -> bool:
+    """True if a Selenium error means the browser itself is gone, not just an element."""
+    if isinstance(error, InvalidSessionIdException):
+        return True
+    return isinstance(error, WebDriverException) and any(marker in str(error).lower() for marker in SESSION_LOST_MARKERS)
+
 
 class ESSJobScraper:
-    def __init__(self):
-        # Use the complete URL with search parameters
-        self.base_url = "https://www.ess.gov.si/iskalci-zaposlitve/iskanje-zaposlitve/iskanje-dela/#/?iskalniTekst=&iskalnaLokacija=&drzava=SI,&datObj=TODAY"
+    def __init__(self, base_url: str = None, recycle_every: int = None, max_heap_mb: float = None,
+                 shard: Tuple[int, int] = None, extraction: str = None, keep_browser: bool = False):
+        # Use the complete URL with search parameters (overridable, e.g. for the local benchmark replica)
+        self.base_url = base_url or ESS_SEARCH_URL
+        self.recycle_every = SCRAPER_RECYCLE_EVERY if recycle_every is None else recycle_every
+        self.max_heap_mb = SCRAPER_MAX_HEAP_MB if max_heap_mb is None else max_heap_mb
+        # (k, N): only scrape the vacancies whose hashed ID falls into shard k of N
+        self.shard = shard
+        self.extraction = extraction or SCRAPER_EXTRACTION
+        if self.extraction not in ('dom', 'network'):
+            raise ValueError(f"Unknown extraction mode {self.extraction!r}, use 'dom' or 'network'")
+        self._capture = None
+        # Keep Chrome open between scrape_jobs_with_selenium calls (daemon mode); close() ends it
+        self.keep_browser = keep_browser
+        self._driver = None
+        # Card keys of the jobs returned by the last scrape_jobs_with_selenium call, in order
+        self.scraped_keys: List[Optional[str]] = []
+        # Why the last scrape_jobs_with_selenium call failed, or None
+        self.last_error: Optional[str] = None
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
@@ -27,7 +86,8 @@ class ESSJobScraper:
     def get_page_content(self, url: str) -> str:
         """Get the HTML content of a page."""
         try:
-            response = requests.get(url, headers=self.headers)
+            # Pooled session, per-host rate limit and conditional requests against the HTTP cache
+            response = get_transport().get(url, headers=self.headers)
             response.encoding = 'utf-8'  # Explicitly set UTF-8 encoding
             return response.text
         except Exception as e:
@@ -80,10 +140,7 @@ class ESSJobScraper:
 
         return job_titles
 
-    def scrape_jobs_with_selenium(self, limit=None):
-        """
-        Use Selenium to scrape jobs from the ESS website with improved error handling.
-        """
+    def _chrome_options(self) -> Options:
         # Enhanced Chrome options for better stability
         chrome_options = Options()
         chrome_options.add_argument("--headless")
@@ -95,44 +152,672 @@ class ESSJobScraper:
         chrome_options.add_argument("--disable-infobars")
         chrome_options.add_argument("--disable-browser-side-navigation")
         chrome_options.page_load_strategy = 'eager'  # Don't wait for all resources
-        
+        if self.extraction == 'network':
+            # Network events (and through them the JSON responses) end up in the performance log
+            chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        return chrome_options
+
+    def _start_driver(self):
+        """Start headless Chrome with CDP performance metrics enabled."""
         # Initialize the driver with longer timeouts
-        driver = webdriver.Chrome(options=chrome_options)
-        driver.set_page_load_timeout(180)  # 3 minutes
-        driver.set_script_timeout(180)
-        
+        with get_metrics().span("scrape.browser_startup"):
+            driver = webdriver.Chrome(options=self._chrome_options())
+            driver.set_page_load_timeout(180)  # 3 minutes
+            driver.set_script_timeout(180)
         try:
-            # Navigate to the URL with retry
-            max_load_retries = 3
-            for load_attempt in range(max_load_retries):
+            driver.execute_cdp_cmd("Performance.enable", {})
+        except Exception as e:
+            print(f"Warning: Could not enable CDP performance metrics: {e}")
+        if self.extraction == 'network':
+            self._capture = NetworkCapture(driver)
+        return driver
+
+    def _warm_driver(self):
+        """The browser kept from the previous call if it is still alive, else a new one."""
+        if self._driver is not None:
+            try:
+                # Leave the SPA first, or loading the search URL again would only change the hash
+                self._driver.get('about:blank')
+                return self._driver
+            except Exception:
+                print("Kept browser is no longer responding, starting a new one")
+                self.close()
+        return self._start_driver()
+
+    def use_driver(self, driver) -> None:
+        """Scrape with a browser started elsewhere (e.g. a shared pool) and keep it open afterwards."""
+        self.keep_browser = True
+        self._driver = driver
+
+    def release_driver(self):
+        """Hand back the kept browser without quitting it; None if there is none or it stopped responding."""
+        driver, self._driver = self._driver, None
+        if driver is None:
+            return None
+        try:
+            driver.current_url
+            return driver
+        except Exception:
+            print("Kept browser is no longer responding, closing it")
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            return None
+
+    def close(self) -> None:
+        """Quit the browser kept open by keep_browser."""
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            except Exception:
+                pass
+            self._driver = None
+
+    def _load_listing(self, driver) -> bool:
+        """Open the search page, retrying until job cards are shown."""
+        max_load_retries = 3
+        for load_attempt in range(max_load_retries):
+            try:
+                print(f"Loading URL (attempt {load_attempt + 1}/{max_load_retries}): {self.base_url}")
+                driver.get(self.base_url)
+
+                # Wait for either job listings OR the page to load completely
+                WebDriverWait(driver, 60).until(
+                    EC.presence_of_element_located((By.TAG_NAME, "body"))
+                )
+                time.sleep(3)  # Give JS time to execute
+
+                # Check if page loaded successfully
+                if len(driver.find_elements(By.CSS_SELECTOR, ".list-group-item")) > 0:
+                    print("Page loaded successfully with job listings")
+                    return True
+                else:
+                    print("No job listings found, might retry...")
+                    if load_attempt < max_load_retries - 1:
+                        time.sleep(10)
+                        driver.refresh()
+            except Exception as e:
+                print(f"Page load attempt {load_attempt + 1} failed: {e}")
+                if load_attempt < max_load_retries - 1:
+                    time.sleep(10)
+                    continue
+        print("All page load attempts failed")
+        return False
+
+    def _expand_list(self, driver, target: int) -> Tuple[int, int]:
+        """Click "Show more" until at least target cards are loaded; returns (cards loaded, clicks)."""
+        max_attempts = 100  # Increased max attempts for full scraping
+        attempts = 0
+        jobs_loaded = 0
+
+        while attempts < max_attempts:
+            # Force wait for page to fully load before checking job count
+            time.sleep(2)
+
+            # Count current jobs
+            job_elements = driver.find_elements(By.CSS_SELECTOR, ".list-group-item")
+            jobs_loaded = len(job_elements)
+            print(f"Currently loaded: {jobs_loaded} jobs")
+
+            # Check if we've loaded enough jobs
+            if jobs_loaded >= target:
+                print(f"Loaded {jobs_loaded} jobs, which meets our limit of {target}")
+                break
+
+            # Check if button exists before trying to click
+            show_more_buttons = driver.find_elements(By.CSS_SELECTOR, "button.show-more-btn")
+            if not show_more_buttons:
+                print("No more 'Show more' button found")
+                break
+
+            try:
+                # Use JavaScript to scroll to the button and click it
+                button = show_more_buttons[0]
+                driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", button)
+                time.sleep(1)  # Give time for scrolling
+                driver.execute_script("arguments[0].click();", button)
+
+                print(f"Clicked 'Show more' button, attempt {attempts+1}")
+                attempts += 1
+
+                # Wait between clicks to ensure content loads
+                time.sleep(3)
+
+            except Exception as e:
+                print(f"Error clicking 'Show more' button: {str(e)}")
+                break
+
+        return jobs_loaded, attempts
+
+    def _card_keys(self, driver) -> List[str]:
+        """Vacancy ID of every loaded job card (title and company text for cards without one)."""
+        return driver.execute_script("""
+            return Array.from(document.querySelectorAll('.list-group-item')).map(function (card) {
+                if (card.id && card.id.indexOf('vacancy-') === 0) { return card.id.slice(8); }
+                var title = card.querySelector('h5.list-item-title');
+                var company = card.querySelector('p.list-item-text');
+                return (title ? title.textContent.trim() : '') + '|' + (company ? company.textContent.trim() : '');
+            });
+        """) or []
+
+    def browser_memory(self, driver) -> Dict[str, float]:
+        """JS heap (MB) and DOM node count of the page, from CDP Performance.getMetrics."""
+        try:
+            result = driver.execute_cdp_cmd("Performance.getMetrics", {})
+            values = {metric['name']: metric['value'] for metric in result.get('metrics', [])}
+            return {
+                'heap_mb': round(values.get('JSHeapUsedSize', 0) / 2 ** 20, 1),
+                'dom_nodes': int(values.get('Nodes', 0)),
+            }
+        except Exception:
+            return {}
+
+    def _recycle_reason(self, vacancies_on_driver: int, memory: Dict[str, float]) -> Optional[str]:
+        if self.recycle_every and vacancies_on_driver >= self.recycle_every:
+            return f"{vacancies_on_driver} vacancies"
+        if self.max_heap_mb and memory.get('heap_mb', 0) >= self.max_heap_mb:
+            return f"JS heap {memory['heap_mb']} MB"
+        return None
+
+    def _restart_driver(self, driver, reason: str):
+        """Replace the browser with a fresh one showing the search results again."""
+        print(f"\nRecycling browser ({reason})")
+        get_metrics().increment("scrape.driver_recycles")
+        with get_metrics().span("scrape.driver_recycle", reason=reason):
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            driver = self._start_driver()
+            if not self._load_listing(driver):
+                driver.quit()
+                raise RuntimeError("Could not reload the job list after recycling the browser")
+        return driver
+
+    def _extract_modal_dom(self, driver, job_detail: Dict) -> None:
+        """Read the open vacancy modal's sections into job_detail."""
+        # Extract title and company directly from the modal instead of the card
+        try:
+            # Title extraction from modal using the info-title class
+            title_div = driver.find_element(By.CSS_SELECTOR, ".info-title.vacancies-name-detail")
+            if title_div:
+                title_text = title_div.text.strip()
+                # Title format is usually "JOB TITLE | LOCATION"
+                if "|" in title_text:
+                    title = title_text.split("|")[0].strip()
+                    job_detail["title"] = title
+                    print(f"Title from modal: {title}")
+                else:
+                    job_detail["title"] = title_text
+                    print(f"Title from modal (no separator): {title_text}")
+
+            # Company extraction from modal using the vacancies-organization class
+            company_div = driver.find_element(By.CSS_SELECTOR, ".vacancies-organization")
+            if company_div:
+                company_text = company_div.text.strip()
+                job_detail["company"] = company_text
+                print(f"Company from modal: {company_text}")
+        except Exception as e:
+            print(f"Warning: Could not extract title/company from modal: {str(e)}")
+            # Fallback to card extraction if modal extraction fails
+            # ... existing code for fallback extraction ...
+
+        # Wait a moment for content to fully load
+        time.sleep(3)
+
+        # Extract detailed information from the modal
+        print("Extracting details from modal...")
+
+        # Process job description
+        try:
+            desc_section = driver.find_elements(By.CSS_SELECTOR, ".section-opis .text-justify")
+            if desc_section:
+                job_detail["description"] = desc_section[0].text.strip()
+                print(f"Description: {job_detail['description'][:50]}..." if len(job_detail['description']) > 50 else f"Description: {job_detail['description']}")
+            else:
+                job_detail["description"] = ""
+                print("No description found")
+        except Exception as e:
+            print(f"Warning: Could not get description: {str(e)}")
+            job_detail["description"] = ""
+
+        # Process job requirements
+        try:
+            req_section = driver.find_elements(By.CSS_SELECTOR, ".section-Pricakujemo")
+            if req_section:
+                requirements = []
+                req_items = req_section[0].find_elements(By.CSS_SELECTOR, ".body-text")
+                for item in req_items:
+                    requirements.append(item.text.strip())
+                job_detail["requirements"] = requirements
+                print(f"Requirements: {requirements[:2]}..." if len(requirements) > 2 else f"Requirements: {requirements}")
+            else:
+                job_detail["requirements"] = []
+                print("No requirements found")
+        except Exception as e:
+            print(f"Warning: Could not get requirements: {str(e)}")
+            job_detail["requirements"] = []
+
+        # Process job benefits
+        try:
+            benefits_section = driver.find_elements(By.CSS_SELECTOR, ".section-nudimo")
+            if benefits_section:
+                benefits = []
+                benefit_items = benefits_section[0].find_elements(By.CSS_SELECTOR, ".body-text")
+                for item in benefit_items:
+                    benefits.append(item.text.strip())
+                job_detail["benefits"] = benefits
+                print(f"Benefits: {benefits[:2]}..." if len(benefits) > 2 else f"Benefits: {benefits}")
+            else:
+                job_detail["benefits"] = []
+                print("No benefits found")
+        except Exception as e:
+            print(f"Warning: Could not get benefits: {str(e)}")
+            job_detail["benefits"] = []
+
+        # Process application method
+        try:
+            app_section = driver.find_elements(By.CSS_SELECTOR, ".section-nacin-prijave")
+            if app_section:
+                job_detail["application_method"] = app_section[0].text.replace("Način prijave", "").strip()
+                print(f"Application method: {job_detail['application_method']}")
+            else:
+                job_detail["application_method"] = ""
+                print("No application method found")
+        except Exception as e:
+            print(f"Warning: Could not get application method: {str(e)}")
+            job_detail["application_method"] = ""
+
+        # Process contact info
+        try:
+            contact_section = driver.find_elements(By.CSS_SELECTOR, ".section-kontakt")
+            if contact_section:
+                job_detail["contact_info"] = contact_section[0].text.replace("Kontakt za kandidata", "").strip()
+                print(f"Contact info: {job_detail['contact_info'][:50]}..." if len(job_detail['contact_info']) > 50 else f"Contact info: {job_detail['contact_info']}")
+            else:
+                job_detail["contact_info"] = ""
+                print("No contact info found")
+        except Exception as e:
+            print(f"Warning: Could not get contact info: {str(e)}")
+            job_detail["contact_info"] = ""
+
+        # Process location - updated to handle location extraction more reliably
+        try:
+            location_div = driver.find_elements(By.CSS_SELECTOR, ".info-title.vacancies-name-detail")
+            if location_div:
+                location_text = location_div[0].text.strip()
+                if "|" in location_text:
+                    location = location_text.split("|")[1].strip()
+                    # Clean up location by removing the map marker icon text if present
+                    if "map-marker-alt" in location:
+                        location = location.replace("map-marker-alt", "").strip()
+                    job_detail["location"] = location
+                    print(f"Location: {location}")
+                else:
+                    job_detail["location"] = ""
+                    print("No location found in title")
+            else:
+                job_detail["location"] = ""
+                print("No location div found")
+        except Exception as e:
+            print(f"Warning: Could not get location: {str(e)}")
+            job_detail["location"] = ""
+
+    def _read_open_vacancy(self, driver, job_detail: Dict) -> None:
+        """Wait for the vacancy modal that is opening and read its URL, ID and details into job_detail."""
+        # Wait for the modal to load
+        try:
+            if self.extraction == 'network':
+                # The route changes as soon as the modal opens; no need to wait for its markup
+                WebDriverWait(driver, 10).until(lambda d: "/#/pdm/" in d.current_url)
+            else:
+                WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, ".pdm-container"))
+                )
+                print("Modal loaded successfully")
+
+                # Wait a moment to ensure the URL in the browser is fully updated
+                time.sleep(2)
+
+            # Get the current URL after modal is loaded - this is exactly what we want
+            modal_url = driver.current_url
+
+            # Simply save the exact URL from the browser when modal is open
+            job_detail["job_url"] = modal_url
+            print(f"Saved job URL from modal: {modal_url}")
+
+            # IMPORTANT: Don't override this URL anywhere else in the code!
+
+            # Extract job ID if needed
+            if "/#/pdm/" in modal_url:
+                try:
+                    job_id = modal_url.split("/#/pdm/")[1].strip()
+                    job_detail["job_id"] = job_id
+                    print(f"Extracted job ID: {job_id}")
+                except Exception as e:
+                    print(f"Warning: Could not extract job ID from URL: {str(e)}")
+        except Exception as e:
+            print(f"Error waiting for modal: {str(e)}")
+            raise
+
+        payload = None
+        if self.extraction == 'network' and job_detail["job_id"]:
+            payload = self._capture.wait_for(job_detail["job_id"])
+        if payload:
+            job_detail.update(payload)
+            print(f"Extracted {', '.join(sorted(payload))} from the vacancy JSON")
+        else:
+            if self.extraction == 'network':
+                print("No vacancy JSON captured, reading the modal instead")
+                get_metrics().increment("scrape.network_fallbacks")
+                WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, ".pdm-container"))
+                )
+            self._extract_modal_dom(driver, job_detail)
+
+    def open_vacancy(self, driver, vacancy_id: str) -> Tuple[Dict, bool]:
+        """Open a vacancy directly through its #/pdm/<id> deep link, without the list."""
+        job_detail = {"title": "Unknown", "company": "Unknown", "job_id": vacancy_id, "job_url": ""}
+        try:
+            print(f"\n--- Opening vacancy {vacancy_id} by deep link ---")
+            driver.get(f"{self.base_url.split('#')[0]}#/pdm/{vacancy_id}")
+            self._read_open_vacancy(driver, job_detail)
+            return job_detail, True
+        except Exception as e:
+            if _session_lost(e):
+                raise
+            print(f"Error opening vacancy {vacancy_id}: {str(e)}")
+            return job_detail, False
+
+    def _return_to_list(self, driver) -> None:
+        """Close an open vacancy and wait for the job list, without reloading the page."""
+        if "/#/pdm/" in driver.current_url:
+            driver.back()
+        WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, ".list-group-item"))
+        )
+
+    def _locate_card(self, driver, index: int, card_key: str) -> Optional[int]:
+        """
+        Position of the card with card_key in the list now shown, loading more cards
+        if needed; None if it is no longer listed.
+
+        A list loaded again (after a browser restart or a reload) can start with
+        vacancies posted since, which moves every earlier card further down.
+        """
+        keys = self._card_keys(driver)
+        while True:
+            if index < len(keys) and keys[index] == card_key:
+                return index
+            if card_key in keys:
+                return keys.index(card_key)
+            loaded, _ = self._expand_list(driver, len(keys) + 1)
+            if loaded <= len(keys):
+                return None
+            keys = self._card_keys(driver)
+
+    def scrape_vacancy(self, driver, index: int, max_jobs_to_scrape: int,
+                       card_key: Optional[str] = None) -> Tuple[Dict, bool]:
+        """
+        Open the index-th job card's modal, extract its details and go back to the list.
+
+        With a card_key the card is found by its key instead, in case the list
+        moved since the key was read at that position.
+        Returns the job detail (possibly partial) and whether extraction succeeded.
+        Raises only if the browser session itself was lost.
+        """
+        # Initialize job_detail outside the try block
+        job_detail = {"title": "Unknown", "company": "Unknown", "job_id": "", "job_url": ""}
+        success = False
+
+        try:
+            print(f"\n--- Processing job {index+1}/{max_jobs_to_scrape} ---")
+
+            # Retrieve job cards again in case the DOM has been refreshed
+            job_cards = driver.find_elements(By.CSS_SELECTOR, ".list-group-item")
+            if index >= len(job_cards):
+                # A fresh or reloaded page only shows the first cards; load the next stretch
+                self._expand_list(driver, min(max_jobs_to_scrape, index + (self.recycle_every or max_jobs_to_scrape)))
+                job_cards = driver.find_elements(By.CSS_SELECTOR, ".list-group-item")
+            if card_key is not None:
+                position = self._locate_card(driver, index, card_key)
+                if position is None:
+                    raise LookupError(f"Vacancy {card_key} is no longer listed")
+                if position != index:
+                    print(f"Vacancy {card_key} moved from position {index+1} to {position+1}")
+                    index = position
+                    job_cards = driver.find_elements(By.CSS_SELECTOR, ".list-group-item")
+
+            # Get the current job card
+            job_card = job_cards[index]
+
+            # Extract job ID from the card's ID attribute
+            try:
+                job_card_id = job_card.get_attribute("id")
+                if job_card_id and job_card_id.startswith("vacancy-"):
+                    # Try to find the job ID embedded in the DOM
+                    # This is a first attempt to get the job ID
+                    print(f"Job card ID: {job_card_id}")
+                else:
+                    job_card_id = None
+            except Exception as e:
+                print(f"Warning: Could not get job card ID: {str(e)}")
+                job_card_id = None
+
+            # Extract job URL/href before clicking
+            try:
+                # Get the href attribute which contains the direct link to the job
+                job_url = job_card.get_attribute("href")
+                if job_url:
+                    job_detail["job_url"] = job_url
+                    print(f"Job URL: {job_url}")
+                else:
+                    # If href is not available, try to get the current URL with fragment identifier
+                    job_card_id = job_card.get_attribute("id")
+                    if job_card_id:
+                        # Construct URL with fragment identifier
+                        base_url = driver.current_url.split('#')[0]
+                        job_detail["job_url"] = f"{base_url}#{job_card_id}"
+                        print(f"Constructed Job URL: {job_detail['job_url']}")
+                    else:
+                        # As a fallback, get the ID from the data attribute that contains the job reference
+                        job_ref = job_card.get_attribute("data-reference") or job_card.get_attribute("data-id")
+                        if job_ref:
+                            job_detail["job_url"] = f"{self.base_url}&selectedVacancyId={job_ref}"
+                            print(f"Reference-based URL: {job_detail['job_url']}")
+                        else:
+                            job_detail["job_url"] = ""
+                            print("No job URL could be extracted")
+            except Exception as e:
+                print(f"Warning: Could not get job URL: {str(e)}")
+                job_detail["job_url"] = ""
+
+            # Extract the basic job title before clicking
+            try:
+                job_title_element = job_card.find_element(By.CSS_SELECTOR, "h5.list-item-title")
+                job_title = job_title_element.text.strip()
+                job_detail["title"] = job_title
+                print(f"Title: {job_title}")
+            except Exception as e:
+                print(f"Warning: Could not get job title: {str(e)}")
+
+            # Extract company info before clicking
+            try:
+                company_element = job_card.find_element(By.CSS_SELECTOR, "p.list-item-text")
+                company_info = company_element.text.strip()
+                job_detail["company"] = company_info
+                print(f"Company: {company_info}")
+            except Exception as e:
+                print(f"Warning: Could not get company info: {str(e)}")
+
+            # Click on the job card to open the modal
+            print("Clicking job card to open modal...")
+            try:
+                driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", job_card)
+                time.sleep(1)
+                driver.execute_script("arguments[0].click();", job_card)
+            except Exception as e:
+                print(f"Error clicking job card: {str(e)}")
+                raise
+
+            self._read_open_vacancy(driver, job_detail)
+
+            # Mark as successful if we got this far
+            success = True
+
+            # Click back to list
+            print("Clicking back to list...")
+            try:
+                back_buttons = driver.find_elements(By.CSS_SELECTOR, "a.mobile-link")
+                if back_buttons:
+                    driver.execute_script("arguments[0].click();", back_buttons[0])
+                    print("Clicked back button")
+                else:
+                    print("Back button not found, trying alternate method")
+                    # Try alternate method - close button
+                    close_buttons = driver.find_elements(By.CSS_SELECTOR, "div[aria-label='Close']")
+                    if close_buttons:
+                        driver.execute_script("arguments[0].click();", close_buttons[0])
+                        print("Clicked close button")
+                    else:
+                        print("Close button not found, trying browser back")
+                        driver.back()
+                        print("Used browser back button")
+            except Exception as e:
+                print(f"Warning: Could not click back to list: {str(e)}")
+                # If we can't click back, try refreshing the page
+                driver.refresh()
+                print("Refreshed page instead")
+
+            # Wait for the list to reload
+            try:
+                WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, ".list-group-item"))
+                )
+                print("List reloaded successfully")
+            except Exception as e:
+                print(f"Warning: Wait for list reload failed: {str(e)}")
+                # If we can't wait for the list, try refreshing the page
+                driver.refresh()
+                WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, ".list-group-item"))
+                )
+                print("Refreshed page and list reloaded")
+
+            # Wait a moment to ensure we're back to the list
+            if self.extraction == 'dom':
+                time.sleep(2)
+
+        except Exception as e:
+            if _session_lost(e):
+                raise
+            print(f"Error processing job {index+1}: {str(e)}")
+
+            # Get back to the list without reloading it, so the cards loaded so far stay loaded;
+            # the vacancy itself is retried at the end of the run
+            try:
+                self._return_to_list(driver)
+                print("Recovered by returning to the list")
+            except Exception as recovery_error:
+                if _session_lost(recovery_error):
+                    raise
+                print(f"Could not return to the list ({str(recovery_error)}), reloading the page")
                 try:
-                    print(f"Loading URL (attempt {load_attempt + 1}/{max_load_retries}): {self.base_url}")
                     driver.get(self.base_url)
-                    
-                    # Wait for either job listings OR the page to load completely
-                    WebDriverWait(driver, 60).until(
-                        EC.presence_of_element_located((By.TAG_NAME, "body"))
+                    WebDriverWait(driver, 10).until(
+                        EC.presence_of_element_located((By.CLASS_NAME, "list-group-item"))
                     )
-                    time.sleep(3)  # Give JS time to execute
-                    
-                    # Check if page loaded successfully
-                    if len(driver.find_elements(By.CSS_SELECTOR, ".list-group-item")) > 0:
-                        print("Page loaded successfully with job listings")
-                        break
-                    else:
-                        print("No job listings found, might retry...")
-                        if load_attempt < max_load_retries - 1:
-                            time.sleep(10)
-                            driver.refresh()
-                except Exception as e:
-                    print(f"Page load attempt {load_attempt + 1} failed: {e}")
-                    if load_attempt < max_load_retries - 1:
-                        time.sleep(10)
-                        continue
+                    time.sleep(3)
+                except Exception as reload_error:
+                    if _session_lost(reload_error):
+                        raise
+                    print(f"Failed to recover: {str(reload_error)}")
+
+        return job_detail, success
+
+    def _card_key_at(self, driver, index: int) -> Optional[str]:
+        try:
+            keys = self._card_keys(driver)
+            return keys[index] if index < len(keys) else None
+        except Exception:
+            return None
+
+    def _add_job(self, job_data: List[Dict], job_detail: Dict, card_key: Optional[str]) -> None:
+        # Add the job detail to our collection regardless of success
+        # This ensures we capture whatever data we managed to get
+        if job_detail and job_detail["title"] != "Unknown":
+            job_data.append(job_detail)
+            self.scraped_keys.append(card_key)
+            print(f"Added job data for {job_detail['title']}")
+
+    def _retry_failed(self, driver, retry_queue: Dict[str, Tuple[int, Dict, Optional[str]]],
+                      max_jobs_to_scrape: int):
+        """
+        Retry queued vacancies: by #/pdm/<id> deep link when the key is a vacancy ID,
+        otherwise by opening the card again. Recovered vacancies leave the queue.
+
+        Returns the driver (a new one if the browser was lost) and the recovered
+        (job detail, card key) pairs.
+        """
+        recovered = []
+        for attempt in range(1, SCRAPER_RETRY_ATTEMPTS + 1):
+            if not retry_queue:
+                break
+            print(f"\nRetrying {len(retry_queue)} failed vacancies (pass {attempt}/{SCRAPER_RETRY_ATTEMPTS})")
+            for key, (index, partial, card_key) in list(retry_queue.items()):
+                started = time.perf_counter()
+                try:
+                    if re.fullmatch(r'[\w-]+', key):
+                        job_detail, success = self.open_vacancy(driver, key)
                     else:
-                        print("All page load attempts failed")
-                        return []
-            
+                        try:
+                            self._return_to_list(driver)
+                        except WebDriverException as e:
+                            if _session_lost(e) or not self._load_listing(driver):
+                                raise
+                        job_detail, success = self.scrape_vacancy(driver, index, max_jobs_to_scrape, card_key)
+                except WebDriverException as e:
+                    print(f"Retry of job {index+1} failed: {e}")
+                    if _session_lost(e):
+                        driver = self._restart_driver(driver, "crash")
+                    continue
+
+                get_metrics().record(
+                    "scrape.vacancy_retry", time.perf_counter() - started,
+                    index=index, attempt=attempt, status="ok" if success else "error"
+                )
+                if success:
+                    retry_queue.pop(key)
+                    recovered.append((job_detail, card_key))
+                    get_metrics().increment("scrape.retry_recovered")
+                    print(f"Recovered job {index+1} on retry")
+        return driver, recovered
+
+    def scrape_jobs_with_selenium(self, limit=None, skip_keys=None):
+        """
+        Use Selenium to scrape jobs from the ESS website with improved error handling.
+
+        The browser is recycled every `recycle_every` vacancies, when the page's JS
+        heap exceeds `max_heap_mb`, or when Chrome crashes; the new browser resumes
+        at the next vacancy. Vacancies whose card key is in `skip_keys` are not opened.
+        Raises RuntimeError if the list can't be loaded or the scrape stops early,
+        instead of returning the jobs scraped so far.
+        """
+        driver = self._warm_driver()
+        job_data = []
+        # vacancy ID (or card key) -> (list index, partial job detail, card key)
+        retry_queue: Dict[str, Tuple[int, Dict, Optional[str]]] = {}
+        self.scraped_keys = []
+        self.last_error = None
+        healthy = True
+
+        try:
+            # Navigate to the URL with retry
+            with get_metrics().span("scrape.initial_page_load"):
+                if not self._load_listing(driver):
+                    raise RuntimeError("Could not load the job list")
+
             # Get total jobs count
             try:
                 total_jobs_element = WebDriverWait(driver, 10).until(
@@ -140,424 +825,160 @@ class ESSJobScraper:
                 )
                 total_jobs = int(total_jobs_element.text.strip())
                 print(f"Total jobs available: {total_jobs}")
-                
+
                 # Exit early if no jobs are available
                 if total_jobs == 0:
                     print("No jobs available today. Exiting scraper.")
                     return []
-                
+
             except Exception as e:
                 print(f"Could not get total jobs count: {e}")
-                driver.quit()
                 return []
-            
+
             # Adjust max jobs to scrape based on limit
             max_jobs_to_scrape = total_jobs if limit is None else min(limit, total_jobs)
             print(f"Will scrape up to {max_jobs_to_scrape} jobs")
-            
-            # Keep clicking "Show more" button until all needed jobs are loaded
-            max_attempts = 100  # Increased max attempts for full scraping
-            attempts = 0
-            
-            while attempts < max_attempts:
-                # Force wait for page to fully load before checking job count
-                time.sleep(2)
-                
-                # Count current jobs
-                job_elements = driver.find_elements(By.CSS_SELECTOR, ".list-group-item")
-                jobs_loaded = len(job_elements)
-                print(f"Currently loaded: {jobs_loaded} jobs")
-                
-                # Check if we've loaded enough jobs
-                if jobs_loaded >= max_jobs_to_scrape:
-                    print(f"Loaded {jobs_loaded} jobs, which meets our limit of {max_jobs_to_scrape}")
-                    break
-                    
-                # Check if button exists before trying to click
-                show_more_buttons = driver.find_elements(By.CSS_SELECTOR, "button.show-more-btn")
-                if not show_more_buttons:
-                    print("No more 'Show more' button found")
-                    break
-                    
-                try:
-                    # Use JavaScript to scroll to the button and click it
-                    button = show_more_buttons[0]
-                    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", button)
-                    time.sleep(1)  # Give time for scrolling
-                    driver.execute_script("arguments[0].click();", button)
-                    
-                    print(f"Clicked 'Show more' button, attempt {attempts+1}")
-                    attempts += 1
-                    
-                    # Wait between clicks to ensure content loads
-                    time.sleep(3)
-                    
-                except Exception as e:
-                    print(f"Error clicking 'Show more' button: {str(e)}")
-                    break
-            
+
+            # Keep clicking "Show more" button until the first stretch of jobs is loaded;
+            # the rest is loaded as processing reaches it, so a recycled browser starts light.
+            # A shard, or a poll for unseen vacancies, needs the whole list to pick its vacancies.
+            first_stretch = min(max_jobs_to_scrape, self.recycle_every or max_jobs_to_scrape)
+            if self.shard or skip_keys is not None:
+                first_stretch = max_jobs_to_scrape
+            with get_metrics().span("scrape.list_expansion") as expansion_span:
+                jobs_loaded, expansion_span["clicks"] = self._expand_list(driver, first_stretch)
+
             # Process only the limited number of job listings
-            job_cards = driver.find_elements(By.CSS_SELECTOR, ".list-group-item")
-            job_cards = job_cards[:max_jobs_to_scrape]  # Limit the job cards to process
-            
-            # Create a list to store complete job data
-            job_data = []
-            
-            # Process limited jobs
-            print(f"Starting to process {len(job_cards)} jobs in detail...")
-            
-            for index in range(len(job_cards)):
-                # Initialize job_detail outside the try block
-                job_detail = {"title": "Unknown", "company": "Unknown", "job_id": "", "job_url": ""}
-                success = False
-                
+            if jobs_loaded < first_stretch:
+                max_jobs_to_scrape = jobs_loaded
+            indices = range(max_jobs_to_scrape)
+            keys = []
+            if self.shard or skip_keys is not None:
+                keys = self._card_keys(driver)[:max_jobs_to_scrape]
+                indices = range(len(keys))
+            if self.shard:
+                indices = [index for index in indices if in_shard(keys[index], self.shard)]
+                print(f"Shard {self.shard[0]}/{self.shard[1]}: {len(indices)} of {len(keys)} jobs")
+            if skip_keys is not None:
+                indices = [index for index in indices if keys[index] not in skip_keys]
+                print(f"{len(indices)} of {len(keys)} jobs not seen before")
+            print(f"Starting to process {len(indices)} jobs in detail...")
+
+            vacancies_on_driver = 0
+            memory = {}
+            for index in indices:
+                reason = self._recycle_reason(vacancies_on_driver, memory)
+                if reason:
+                    driver = self._restart_driver(driver, reason)
+                    vacancies_on_driver = 0
+
+                # Restarts reload the list, which may have moved since the keys were read
+                card_key = keys[index] if index < len(keys) else None
+                vacancy_started = time.perf_counter()
                 try:
-                    print(f"\n--- Processing job {index+1}/{len(job_cards)} ---")
-                    
-                    # Retrieve job cards again in case the DOM has been refreshed
-                    job_cards = driver.find_elements(By.CSS_SELECTOR, ".list-group-item")
-                    
-                    # Get the current job card
-                    job_card = job_cards[index]
-                    
-                    # Extract job ID from the card's ID attribute
-                    try:
-                        job_card_id = job_card.get_attribute("id")
-                        if job_card_id and job_card_id.startswith("vacancy-"):
-                            # Try to find the job ID embedded in the DOM
-                            # This is a first attempt to get the job ID
-                            print(f"Job card ID: {job_card_id}")
-                        else:
-                            job_card_id = None
-                    except Exception as e:
-                        print(f"Warning: Could not get job card ID: {str(e)}")
-                        job_card_id = None
-                    
-                    # Extract job URL/href before clicking
-                    try:
-                        # Get the href attribute which contains the direct link to the job
-                        job_url = job_card.get_attribute("href")
-                        if job_url:
-                            job_detail["job_url"] = job_url
-                            print(f"Job URL: {job_url}")
-                        else:
-                            # If href is not available, try to get the current URL with fragment identifier
-                            job_card_id = job_card.get_attribute("id")
-                            if job_card_id:
-                                # Construct URL with fragment identifier
-                                base_url = driver.current_url.split('#')[0]
-                                job_detail["job_url"] = f"{base_url}#{job_card_id}"
-                                print(f"Constructed Job URL: {job_detail['job_url']}")
-                            else:
-                                # As a fallback, get the ID from the data attribute that contains the job reference
-                                job_ref = job_card.get_attribute("data-reference") or job_card.get_attribute("data-id")
-                                if job_ref:
-                                    job_detail["job_url"] = f"{self.base_url}&selectedVacancyId={job_ref}"
-                                    print(f"Reference-based URL: {job_detail['job_url']}")
-                                else:
-                                    job_detail["job_url"] = ""
-                                    print("No job URL could be extracted")
-                    except Exception as e:
-                        print(f"Warning: Could not get job URL: {str(e)}")
-                        job_detail["job_url"] = ""
-                    
-                    # Extract the basic job title before clicking
-                    try:
-                        job_title_element = job_card.find_element(By.CSS_SELECTOR, "h5.list-item-title")
-                        job_title = job_title_element.text.strip()
-                        job_detail["title"] = job_title
-                        print(f"Title: {job_title}")
-                    except Exception as e:
-                        print(f"Warning: Could not get job title: {str(e)}")
-                    
-                    # Extract company info before clicking
-                    try:
-                        company_element = job_card.find_element(By.CSS_SELECTOR, "p.list-item-text")
-                        company_info = company_element.text.strip()
-                        job_detail["company"] = company_info
-                        print(f"Company: {company_info}")
-                    except Exception as e:
-                        print(f"Warning: Could not get company info: {str(e)}")
-                    
-                    # Store the current URL before clicking (this will help construct the direct link later)
-                    current_url_before_click = driver.current_url
-                    
-                    # Click on the job card to open the modal
-                    print("Clicking job card to open modal...")
-                    try:
-                        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", job_card)
-                        time.sleep(1)
-                        driver.execute_script("arguments[0].click();", job_card)
-                    except Exception as e:
-                        print(f"Error clicking job card: {str(e)}")
-                        raise
-                    
-                    # Wait for the modal to load
-                    try:
-                        WebDriverWait(driver, 10).until(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, ".pdm-container"))
-                        )
-                        print("Modal loaded successfully")
-                        
-                        # Wait a moment to ensure the URL in the browser is fully updated
-                        time.sleep(2)
-                        
-                        # Get the current URL after modal is loaded - this is exactly what we want
-                        modal_url = driver.current_url
-                        
-                        # Simply save the exact URL from the browser when modal is open
-                        job_detail["job_url"] = modal_url
-                        print(f"Saved job URL from modal: {modal_url}")
-                        
-                        # IMPORTANT: Don't override this URL anywhere else in the code!
-                        
-                        # Extract job ID if needed
-                        if "/#/pdm/" in modal_url:
-                            try:
-                                job_id = modal_url.split("/#/pdm/")[1].strip()
-                                job_detail["job_id"] = job_id
-                                print(f"Extracted job ID: {job_id}")
-                            except Exception as e:
-                                print(f"Warning: Could not extract job ID from URL: {str(e)}")
-                    except Exception as e:
-                        print(f"Error waiting for modal: {str(e)}")
-                        raise
-                    
-                    # Extract title and company directly from the modal instead of the card
-                    try:
-                        # Title extraction from modal using the info-title class
-                        title_div = driver.find_element(By.CSS_SELECTOR, ".info-title.vacancies-name-detail")
-                        if title_div:
-                            title_text = title_div.text.strip()
-                            # Title format is usually "JOB TITLE | LOCATION"
-                            if "|" in title_text:
-                                title = title_text.split("|")[0].strip()
-                                job_detail["title"] = title
-                                print(f"Title from modal: {title}")
-                            else:
-                                job_detail["title"] = title_text
-                                print(f"Title from modal (no separator): {title_text}")
-                        
-                        # Company extraction from modal using the vacancies-organization class
-                        company_div = driver.find_element(By.CSS_SELECTOR, ".vacancies-organization")
-                        if company_div:
-                            company_text = company_div.text.strip()
-                            job_detail["company"] = company_text
-                            print(f"Company from modal: {company_text}")
-                    except Exception as e:
-                        print(f"Warning: Could not extract title/company from modal: {str(e)}")
-                        # Fallback to card extraction if modal extraction fails
-                        # ... existing code for fallback extraction ...
-                    
-                    # Wait a moment for content to fully load
-                    time.sleep(3)
-                    
-                    # Extract detailed information from the modal
-                    print("Extracting details from modal...")
-                    
-                    # Process job description
-                    try:
-                        desc_section = driver.find_elements(By.CSS_SELECTOR, ".section-opis .text-justify")
-                        if desc_section:
-                            job_detail["description"] = desc_section[0].text.strip()
-                            print(f"Description: {job_detail['description'][:50]}..." if len(job_detail['description']) > 50 else f"Description: {job_detail['description']}")
-                        else:
-                            job_detail["description"] = ""
-                            print("No description found")
-                    except Exception as e:
-                        print(f"Warning: Could not get description: {str(e)}")
-                        job_detail["description"] = ""
-                    
-                    # Process job requirements
-                    try:
-                        req_section = driver.find_elements(By.CSS_SELECTOR, ".section-Pricakujemo")
-                        if req_section:
-                            requirements = []
-                            req_items = req_section[0].find_elements(By.CSS_SELECTOR, ".body-text")
-                            for item in req_items:
-                                requirements.append(item.text.strip())
-                            job_detail["requirements"] = requirements
-                            print(f"Requirements: {requirements[:2]}..." if len(requirements) > 2 else f"Requirements: {requirements}")
-                        else:
-                            job_detail["requirements"] = []
-                            print("No requirements found")
-                    except Exception as e:
-                        print(f"Warning: Could not get requirements: {str(e)}")
-                        job_detail["requirements"] = []
-                    
-                    # Process job benefits
-                    try:
-                        benefits_section = driver.find_elements(By.CSS_SELECTOR, ".section-nudimo")
-                        if benefits_section:
-                            benefits = []
-                            benefit_items = benefits_section[0].find_elements(By.CSS_SELECTOR, ".body-text")
-                            for item in benefit_items:
-                                benefits.append(item.text.strip())
-                            job_detail["benefits"] = benefits
-                            print(f"Benefits: {benefits[:2]}..." if len(benefits) > 2 else f"Benefits: {benefits}")
-                        else:
-                            job_detail["benefits"] = []
-                            print("No benefits found")
-                    except Exception as e:
-                        print(f"Warning: Could not get benefits: {str(e)}")
-                        job_detail["benefits"] = []
-                    
-                    # Process application method
-                    try:
-                        app_section = driver.find_elements(By.CSS_SELECTOR, ".section-nacin-prijave")
-                        if app_section:
-                            job_detail["application_method"] = app_section[0].text.replace("Način prijave", "").strip()
-                            print(f"Application method: {job_detail['application_method']}")
-                        else:
-                            job_detail["application_method"] = ""
-                            print("No application method found")
-                    except Exception as e:
-                        print(f"Warning: Could not get application method: {str(e)}")
-                        job_detail["application_method"] = ""
-                    
-                    # Process contact info
-                    try:
-                        contact_section = driver.find_elements(By.CSS_SELECTOR, ".section-kontakt")
-                        if contact_section:
-                            job_detail["contact_info"] = contact_section[0].text.replace("Kontakt za kandidata", "").strip()
-                            print(f"Contact info: {job_detail['contact_info'][:50]}..." if len(job_detail['contact_info']) > 50 else f"Contact info: {job_detail['contact_info']}")
-                        else:
-                            job_detail["contact_info"] = ""
-                            print("No contact info found")
-                    except Exception as e:
-                        print(f"Warning: Could not get contact info: {str(e)}")
-                        job_detail["contact_info"] = ""
-                    
-                    # Process location - updated to handle location extraction more reliably
-                    try:
-                        location_div = driver.find_elements(By.CSS_SELECTOR, ".info-title.vacancies-name-detail")
-                        if location_div:
-                            location_text = location_div[0].text.strip()
-                            if "|" in location_text:
-                                location = location_text.split("|")[1].strip()
-                                # Clean up location by removing the map marker icon text if present
-                                if "map-marker-alt" in location:
-                                    location = location.replace("map-marker-alt", "").strip()
-                                job_detail["location"] = location
-                                print(f"Location: {location}")
-                            else:
-                                job_detail["location"] = ""
-                                print("No location found in title")
-                        else:
-                            job_detail["location"] = ""
-                            print("No location div found")
-                    except Exception as e:
-                        print(f"Warning: Could not get location: {str(e)}")
-                        job_detail["location"] = ""
-                    
-                    # Mark as successful if we got this far
-                    success = True
-                    
-                    # Click back to list
-                    print("Clicking back to list...")
-                    try:
-                        back_buttons = driver.find_elements(By.CSS_SELECTOR, "a.mobile-link")
-                        if back_buttons:
-                            driver.execute_script("arguments[0].click();", back_buttons[0])
-                            print("Clicked back button")
-                        else:
-                            print("Back button not found, trying alternate method")
-                            # Try alternate method - close button
-                            close_buttons = driver.find_elements(By.CSS_SELECTOR, "div[aria-label='Close']")
-                            if close_buttons:
-                                driver.execute_script("arguments[0].click();", close_buttons[0])
-                                print("Clicked close button")
-                            else:
-                                print("Close button not found, trying browser back")
-                                driver.back()
-                                print("Used browser back button")
-                    except Exception as e:
-                        print(f"Warning: Could not click back to list: {str(e)}")
-                        # If we can't click back, try refreshing the page
-                        driver.refresh()
-                        print("Refreshed page instead")
-                    
-                    # Wait for the list to reload
-                    try:
-                        WebDriverWait(driver, 10).until(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, ".list-group-item"))
-                        )
-                        print("List reloaded successfully")
-                    except Exception as e:
-                        print(f"Warning: Wait for list reload failed: {str(e)}")
-                        # If we can't wait for the list, try refreshing the page
-                        driver.refresh()
-                        WebDriverWait(driver, 10).until(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, ".list-group-item"))
-                        )
-                        print("Refreshed page and list reloaded")
-                    
-                    # Wait a moment to ensure we're back to the list
-                    time.sleep(2)
-                    
-                except Exception as e:
-                    print(f"Error processing job {index+1}: {str(e)}")
-                    
-                    # If we encountered an error, try to get back to the listing page
-                    try:
-                        driver.get(self.base_url)
-                        print("Recovered by reloading base URL")
-                        WebDriverWait(driver, 10).until(
-                            EC.presence_of_element_located((By.CLASS_NAME, "list-group-item"))
-                        )
-                        time.sleep(3)
-                    except Exception as recovery_error:
-                        print(f"Failed to recover: {str(recovery_error)}")
-                
-                finally:
-                    # Add the job detail to our collection regardless of success
-                    # This ensures we capture whatever data we managed to get
-                    if job_detail and job_detail["title"] != "Unknown":
-                        job_data.append(job_detail)
-                        print(f"Added job data for {job_detail['title']}")
-                        if success:
-                            print("Job processed successfully")
-                        else:
-                            print("Job added with partial data")
-            
+                    job_detail, success = self.scrape_vacancy(driver, index, max_jobs_to_scrape, card_key)
+                except WebDriverException as e:
+                    job_detail, success = {"title": "Unknown", "company": "Unknown", "job_id": "", "job_url": ""}, False
+                    if not _session_lost(e):
+                        print(f"Error at job {index+1}: {e}")
+                    else:
+                        # Chrome crashed or the session died: start over in a new browser and retry once
+                        print(f"Browser session lost at job {index+1}: {e}")
+                        driver = self._restart_driver(driver, "crash")
+                        vacancies_on_driver = 0
+                        try:
+                            job_detail, success = self.scrape_vacancy(driver, index, max_jobs_to_scrape, card_key)
+                        except WebDriverException as retry_error:
+                            # Lost again: leave the vacancy to the retry queue and go on in another browser
+                            print(f"Browser session lost again at job {index+1}: {retry_error}")
+                            if _session_lost(retry_error):
+                                driver = self._restart_driver(driver, "crash")
+                vacancies_on_driver += 1
+                memory = self.browser_memory(driver)
+
+                get_metrics().record(
+                    "scrape.vacancy", time.perf_counter() - vacancy_started,
+                    index=index, status="ok" if success else "error", **memory
+                )
+
+                if success:
+                    self._add_job(job_data, job_detail, card_key)
+                else:
+                    # Keep going on the loaded list; this vacancy is retried at the end
+                    vacancy_key = job_detail.get("job_id") or card_key or self._card_key_at(driver, index)
+                    retry_queue[vacancy_key or f"index:{index}"] = (index, job_detail, card_key)
+                    get_metrics().increment("scrape.retry_queued")
+                    print(f"Queued job {index+1} for a retry")
+
+            if retry_queue:
+                driver, recovered = self._retry_failed(driver, retry_queue, max_jobs_to_scrape)
+                for job_detail, card_key in recovered:
+                    self._add_job(job_data, job_detail, card_key)
+            # Vacancies that failed every retry keep whatever data was captured
+            for index, job_detail, card_key in retry_queue.values():
+                self._add_job(job_data, job_detail, card_key)
+            retry_queue.clear()
+
             print(f"\nCompleted processing {len(job_data)} jobs")
             if job_data:
                 print(f"First job title: {job_data[0]['title']}")
                 print(f"Last job title: {job_data[-1]['title']}")
-            
+
             return job_data
-            
+
         except Exception as e:
             print(f"Fatal error in Selenium scraping: {e}")
             import traceback
             traceback.print_exc()
-            return []
+            healthy = False
+            self.last_error = str(e) or type(e).__name__
+            # The jobs scraped so far would pass for the whole list; let the caller fail the run
+            raise RuntimeError(f"Scrape stopped early: {self.last_error}") from e
         finally:
-            try:
-                driver.quit()
-            except:
-                pass
+            if self.keep_browser and healthy:
+                self._driver = driver
+            else:
+                self._driver = None
+                try:
+                    driver.quit()
+                except:
+                    pass
 
 def main():
+    parser = argparse.ArgumentParser(description="Scrape today's ESS vacancies")
+    parser.add_argument('--shard', help="only scrape shard k of N, e.g. 2/4")
+    parser.add_argument('--limit', type=int, default=None, help="stop after this many vacancies")
+    args = parser.parse_args()
+
+    try:
+        shard = parse_shard(args.shard) if args.shard else None
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+
     try:
         print("=== Starting scraper ===")
-        scraper = ESSJobScraper()
+        scraper = ESSJobScraper(shard=shard)
         
         # Use Selenium to get ALL detailed job data (no limit)
-        print("\nStarting job scraping with no limit (scraping all available jobs)")
-        detailed_job_data = scraper.scrape_jobs_with_selenium(limit=None)
+        print("\nStarting job scraping with no limit (scraping all available jobs)" if args.limit is None
+              else f"\nStarting job scraping with a limit of {args.limit} jobs")
+        with get_metrics().span("stage.scrape"), profile_stage("scrape"):
+            detailed_job_data = scraper.scrape_jobs_with_selenium(limit=args.limit)
         
-        # Check if we got any jobs
-        if not detailed_job_data:
-            print("No jobs available to process. Exiting.")
-            return 0  # Exit with success code since this is an expected condition
-            
-        # Only proceed with file saving if we have jobs
         today = datetime.now().strftime('%Y%m%d')
-        batch_file = f"detailed_jobs_{today}.json"
-        with open(batch_file, 'w', encoding='utf-8') as f:
-            json.dump(detailed_job_data, f, ensure_ascii=False, indent=2)
-        print(f"Saved {len(detailed_job_data)} detailed job listings to {batch_file}")
+        if shard:
+            # Always write a shard's file, even an empty one, so the merge can tell it finished
+            batch_file = shard_path(today, shard)
+        else:
+            # Check if we got any jobs
+            if not detailed_job_data:
+                print("No jobs available to process. Exiting.")
+                return 0  # Exit with success code since this is an expected condition
+            batch_file = stage_path('raw', today)
+            
+        saved = write_records(batch_file, detailed_job_data)
+        print(f"Saved {saved} detailed job listings to {batch_file}")
         
         return 0
         
@@ -568,4 +989,7 @@ def main():
         return 1
 
 if __name__ == "__main__":
-    sys.exit(main()) 
\ No newline at end of file
+    configure_profiling()
+    exit_code = main()
+    write_run_metrics()
+    sys.exit(exit_code)
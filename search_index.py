@@ -0,0 +1,275 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from typing import Any, Dict, Iterable, List, Optional
+
+from jsonl_io import find_stage_files, read_records
+from profiling import configure_profiling, profile_stage
+
+SEARCH_INDEX_PATH = os.getenv('SEARCH_INDEX_PATH', 'search_index.db')
+
+FACETS = ('location', 'industry', 'work_mode', 'posted_date')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    doc_key TEXT NOT NULL UNIQUE,
+    title TEXT,
+    company TEXT,
+    location TEXT,
+    town_location TEXT,
+    industry TEXT,
+    work_mode TEXT,
+    posted_date TEXT,
+    job_url TEXT,
+    responsibilities TEXT,
+    key_skills TEXT,
+    record TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_location ON jobs(location);
+CREATE INDEX IF NOT EXISTS jobs_industry ON jobs(industry);
+CREATE INDEX IF NOT EXISTS jobs_work_mode ON jobs(work_mode);
+CREATE INDEX IF NOT EXISTS jobs_posted_date ON jobs(posted_date);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+    title, company, responsibilities, key_skills,
+    content='jobs', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS jobs_ai AFTER INSERT ON jobs BEGIN
+    INSERT INTO jobs_fts(rowid, title, company, responsibilities, key_skills)
+    VALUES (new.id, new.title, new.company, new.responsibilities, new.key_skills);
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_ad AFTER DELETE ON jobs BEGIN
+    INSERT INTO jobs_fts(jobs_fts, rowid, title, company, responsibilities, key_skills)
+    VALUES ('delete', old.id, old.title, old.company, old.responsibilities, old.key_skills);
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_au AFTER UPDATE ON jobs BEGIN
+    INSERT INTO jobs_fts(jobs_fts, rowid, title, company, responsibilities, key_skills)
+    VALUES ('delete', old.id, old.title, old.company, old.responsibilities, old.key_skills);
+    INSERT INTO jobs_fts(rowid, title, company, responsibilities, key_skills)
+    VALUES (new.id, new.title, new.company, new.responsibilities, new.key_skills);
+END;
+
+CREATE TABLE IF NOT EXISTS ingested_files (
+    path TEXT PRIMARY KEY,
+    mtime REAL,
+    size INTEGER,
+    records INTEGER
+);
+"""
+
+_COLUMNS = ('doc_key', 'title', 'company', 'location', 'town_location', 'industry', 'work_mode',
+            'posted_date', 'job_url', 'responsibilities', 'key_skills', 'record')
+
+
+def _doc_key(job: Dict[str, Any]) -> str:
+    """Stable identity of a job: its ESS id, its URL, or a hash of title/company/location."""
+    if job.get('job_id'):
+        return f"id:{job['job_id']}"
+    if job.get('job_url'):
+        return f"url:{job['job_url']}"
+    text = '|'.join(str(job.get(key) or '') for key in ('title', 'company', 'location'))
+    return 'hash:' + hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, list):
+        return '\n'.join(str(item) for item in value if item is not None)
+    return '' if value is None else str(value)
+
+
+def _fts_query(text: str) -> str:
+    """Turn free-form keywords into an FTS5 query of quoted prefix terms."""
+    terms = [term.replace('"', '""') for term in text.split()]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+class SearchIndex:
+    """SQLite FTS5 index with facet columns over analyzed jobs."""
+
+    def __init__(self, path: str = SEARCH_INDEX_PATH):
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def index_records(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Insert or update jobs; jobs seen before are replaced in place."""
+        rows = []
+        for job in records:
+            if not isinstance(job, dict):
+                continue
+            rows.append((
+                _doc_key(job),
+                _text(job.get('title')),
+                _text(job.get('company')),
+                _text(job.get('location')),
+                _text(job.get('town_location')),
+                _text(job.get('industry')),
+                _text(job.get('work_mode')),
+                _text(job.get('posted_date')),
+                _text(job.get('job_url')),
+                _text(job.get('responsibilities')),
+                _text(job.get('key_skills')),
+                json.dumps(job, ensure_ascii=False, default=str),
+            ))
+        updates = ', '.join(f"{column} = excluded.{column}" for column in _COLUMNS[1:])
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO jobs ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' for _ in _COLUMNS)}) "
+                f"ON CONFLICT(doc_key) DO UPDATE SET {updates}",
+                rows
+            )
+        return len(rows)
+
+    def index_file(self, path: str, force: bool = False) -> int:
+        """Index an analyzed jobs file unless it was already indexed with the same size and mtime."""
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        seen = self.conn.execute("SELECT mtime, size FROM ingested_files WHERE path = ?", (key,)).fetchone()
+        if not force and seen and seen['mtime'] == stat.st_mtime and seen['size'] == stat.st_size:
+            return 0
+
+        count = self.index_records(read_records(path))
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO ingested_files (path, mtime, size, records) VALUES (?, ?, ?, ?)",
+                (key, stat.st_mtime, stat.st_size, count)
+            )
+        print(f"Indexed {count} jobs from {path}")
+        return count
+
+    def index_archive(self, start: Optional[str] = None, end: Optional[str] = None) -> int:
+        """Index analyzed jobs from the Parquet archive for an optional date range."""
+        from archive import scan
+        count = 0
+        table = scan('analyzed', start=start, end=end)
+        for batch in table.to_batches(max_chunksize=10000):
+            jobs = batch.to_pylist()
+            for job in jobs:
+                job['posted_date'] = job.get('posted_date') or job.pop('date', None)
+            count += self.index_records(jobs)
+        print(f"Indexed {count} jobs from the archive")
+        return count
+
+    def _where(self, text: Optional[str], filters: Dict[str, Any]):
+        clauses = []
+        params = []
+        if text:
+            clauses.append("jobs.id IN (SELECT rowid FROM jobs_fts WHERE jobs_fts MATCH ?)")
+            params.append(_fts_query(text))
+        for facet in ('location', 'industry', 'work_mode'):
+            if filters.get(facet):
+                clauses.append(f"jobs.{facet} = ?")
+                params.append(filters[facet])
+        if filters.get('date_from'):
+            clauses.append("jobs.posted_date >= ?")
+            params.append(filters['date_from'])
+        if filters.get('date_to'):
+            clauses.append("jobs.posted_date <= ?")
+            params.append(filters['date_to'])
+        where = ' AND '.join(clauses) if clauses else '1'
+        return where, params
+
+    def search(self, text: Optional[str] = None, limit: int = 20, **filters) -> List[Dict[str, Any]]:
+        """
+        Keyword and facet search.
+
+        Filters: location, industry, work_mode, date_from, date_to. Results with
+        keywords are ranked by bm25, otherwise newest first.
+        """
+        where, params = self._where(None, filters)
+        if text:
+            query = (
+                "SELECT jobs.*, bm25(jobs_fts) AS rank FROM jobs_fts JOIN jobs ON jobs.id = jobs_fts.rowid "
+                f"WHERE jobs_fts MATCH ? AND {where} ORDER BY rank LIMIT ?"
+            )
+            params = [_fts_query(text)] + params + [limit]
+        else:
+            query = f"SELECT jobs.* FROM jobs WHERE {where} ORDER BY posted_date DESC LIMIT ?"
+            params = params + [limit]
+        results = []
+        for row in self.conn.execute(query, params):
+            results.append({key: row[key] for key in ('title', 'company', 'location', 'town_location',
+                                                      'industry', 'work_mode', 'posted_date', 'job_url')})
+        return results
+
+    def facet_counts(self, text: Optional[str] = None, top: int = 10, **filters) -> Dict[str, List[tuple]]:
+        """Top values and counts of each facet for the jobs matching the query."""
+        where, params = self._where(text, filters)
+        counts = {}
+        for facet in FACETS:
+            rows = self.conn.execute(
+                f"SELECT {facet} AS value, COUNT(*) AS n FROM jobs WHERE {where} "
+                f"GROUP BY {facet} ORDER BY n DESC LIMIT ?",
+                params + [top]
+            )
+            counts[facet] = [(row['value'], row['n']) for row in rows]
+        return counts
+
+
+def update_index(paths: Optional[List[str]] = None, index_path: str = SEARCH_INDEX_PATH) -> int:
+    """Incrementally index analyzed job files (default: every day's jobs_analyzed_* file in the working directory)."""
+    paths = paths or find_stage_files('analyzed')
+    with SearchIndex(index_path) as index:
+        return sum(index.index_file(path) for path in paths)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local full-text and facet search over analyzed jobs")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    update_parser = subparsers.add_parser('update', help="index new or changed analyzed job files")
+    update_parser.add_argument('files', nargs='*')
+    update_parser.add_argument('--archive', action='store_true', help="index the Parquet archive instead")
+
+    search_parser = subparsers.add_parser('search', help="keyword and facet search")
+    search_parser.add_argument('text', nargs='?')
+    for facet in ('location', 'industry', 'work_mode', 'date_from', 'date_to'):
+        search_parser.add_argument(f"--{facet.replace('_', '-')}", dest=facet)
+    search_parser.add_argument('--limit', type=int, default=20)
+    search_parser.add_argument('--facets', action='store_true', help="print facet counts instead of jobs")
+
+    args = parser.parse_args()
+
+    if args.command == 'update':
+        if args.archive:
+            with SearchIndex() as index:
+                index.index_archive()
+        else:
+            update_index(args.files)
+        return 0
+
+    filters = {facet: getattr(args, facet) for facet in ('location', 'industry', 'work_mode', 'date_from', 'date_to')}
+    with SearchIndex() as index:
+        if args.facets:
+            for facet, values in index.facet_counts(args.text, **filters).items():
+                print(f"{facet}:")
+                for value, count in values:
+                    print(f"  {value or '(empty)'}: {count}")
+        else:
+            for job in index.search(args.text, limit=args.limit, **filters):
+                print(f"{job['posted_date']}  {job['title']} - {job['company']} ({job['location']}, {job['work_mode']})")
+                print(f"    {job['job_url']}")
+    return 0
+
+
+if __name__ == "__main__":
+    configure_profiling()
+    with profile_stage("search_index"):
+        exit_code = main()
+    sys.exit(exit_code)
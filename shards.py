@@ -0,0 +1,159 @@
+"""
+Sharded scraping: split one day's vacancies across several scraper runs.
+
+`python scraper.py --shard 2/4` scrapes only the vacancies whose hashed ID
+falls into shard 2 of 4 and writes detailed_jobs_<day>_shard2of4.jsonl.gz.
+merge_shards() combines the shard files into the day's raw file, dropping
+duplicates, so analysis and upload run once. The pipeline's scrape stage
+merges automatically when shard files for the day are present.
+
+    python shards.py run --shards 4 --limit 40     # local: shards as processes, then merge
+    python shards.py merge [--date YYYYMMDD]
+"""
+import argparse
+import glob
+import hashlib
+import os
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from jsonl_io import JsonlWriter, STAGE_PREFIXES, artifact_name, read_records, stage_path
+
+Shard = Tuple[int, int]
+
+
+def parse_shard(spec: str) -> Shard:
+    """Parse a 'k/N' shard spec (1-based), e.g. '2/4'."""
+    match = re.fullmatch(r'\s*(\d+)\s*/\s*(\d+)\s*', spec or '')
+    if not match:
+        raise ValueError(f"Invalid shard spec {spec!r}, expected k/N such as 2/4")
+    index, count = int(match.group(1)), int(match.group(2))
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard spec {spec!r}, k must be between 1 and N")
+    return index, count
+
+
+def in_shard(key: str, shard: Shard) -> bool:
+    """Deterministically assign a vacancy key to one of N shards by its sha1 hash."""
+    index, count = shard
+    digest = hashlib.sha1(key.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count == index - 1
+
+
+def shard_path(day: str, shard: Shard) -> str:
+    return artifact_name(f"{STAGE_PREFIXES['raw']}_{day}_shard{shard[0]}of{shard[1]}")
+
+
+def find_shard_files(day: str, directory: str = '.') -> List[str]:
+    pattern = os.path.join(directory, f"{STAGE_PREFIXES['raw']}_{day}_shard*of*.jsonl*")
+    return sorted(os.path.normpath(path) for path in glob.glob(pattern) if not path.endswith('.tmp'))
+
+
+def missing_shards(paths: List[str]) -> List[Shard]:
+    """Shards of each shard count seen in the file names that have no file among paths."""
+    found = {}
+    for path in paths:
+        match = re.search(r'shard(\d+)of(\d+)', os.path.basename(path))
+        if match:
+            found.setdefault(int(match.group(2)), set()).add(int(match.group(1)))
+    return [(index, count) for count, indices in sorted(found.items())
+            for index in range(1, count + 1) if index not in indices]
+
+
+def job_key(job: Dict[str, Any]) -> str:
+    """Identity of a scraped vacancy: its ESS id, its URL, or title and company."""
+    if job.get('job_id'):
+        return f"id:{job['job_id']}"
+    if job.get('job_url'):
+        return f"url:{job['job_url']}"
+    return f"text:{job.get('title', '')}|{job.get('company', '')}"
+
+
+def dedupe(jobs: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Yield jobs in order, dropping later records with an already seen job_key."""
+    seen = set()
+    for job in jobs:
+        key = job_key(job)
+        if key not in seen:
+            seen.add(key)
+            yield job
+
+
+def merge_shards(day: str, paths: Optional[List[str]] = None, output: Optional[str] = None) -> Optional[str]:
+    """Combine a day's shard files into its raw stage file; returns the output path."""
+    paths = paths if paths is not None else find_shard_files(day)
+    if not paths:
+        print(f"No shard files found for {day}")
+        return None
+
+    missing = missing_shards(paths)
+    if missing:
+        print(f"Warning: shard files missing for {day}: {', '.join(f'{k}/{n}' for k, n in missing)}")
+
+    output = output or stage_path('raw', day)
+    read = 0
+    with JsonlWriter(output) as writer:
+        def counted():
+            nonlocal read
+            for path in paths:
+                for job in read_records(path):
+                    read += 1
+                    yield job
+        writer.write_all(dedupe(counted()))
+    print(f"Merged {len(paths)} shard files into {output}: {writer.count} jobs ({read - writer.count} duplicates dropped)")
+    return output
+
+
+def run_local(count: int, limit: Optional[int] = None, day: Optional[str] = None) -> int:
+    """Run all shards as concurrent scraper processes, then merge their outputs."""
+    day = day or datetime.now().strftime('%Y%m%d')
+    processes = []
+    for index in range(1, count + 1):
+        command = [sys.executable, 'scraper.py', '--shard', f"{index}/{count}"]
+        if limit is not None:
+            command += ['--limit', str(limit)]
+        log = open(f"scraper_shard{index}of{count}.log", 'w', encoding='utf-8')
+        # Separate metrics directories, or the shards would overwrite each other's metrics files
+        env = dict(os.environ, METRICS_DIR=os.path.join('metrics', f"shard{index}of{count}"))
+        print(f"Starting shard {index}/{count}: {' '.join(command)}")
+        processes.append((index, subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT, env=env), log))
+
+    started = time.perf_counter()
+    failed = []
+    for index, process, log in processes:
+        if process.wait() != 0:
+            failed.append(index)
+        log.close()
+    print(f"All shards finished in {time.perf_counter() - started:.1f}s")
+    if failed:
+        print(f"Shards failed: {', '.join(map(str, failed))} (see scraper_shard*.log)")
+
+    merged = merge_shards(day)
+    return 0 if merged and not failed else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run and merge sharded scrapes")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="scrape locally with one process per shard, then merge")
+    run_parser.add_argument('--shards', type=int, required=True)
+    run_parser.add_argument('--limit', type=int, help="limit passed to every shard's scraper")
+
+    merge_parser = subparsers.add_parser('merge', help="merge a day's shard files into its raw file")
+    merge_parser.add_argument('--date', help="YYYYMMDD, default today")
+    merge_parser.add_argument('files', nargs='*', help="shard files (default: all of the day's)")
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        return run_local(args.shards, args.limit)
+    day = args.date or datetime.now().strftime('%Y%m%d')
+    return 0 if merge_shards(day, args.files or None) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
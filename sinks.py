@@ -0,0 +1,219 @@
+import csv
+import io
+import json
+import os
+import sqlite3
+from typing import Any, Dict, List
+
+# Column layout of the `jobs` table, shared by every sink
+JOBS_COLUMNS = [
+    'id', 'title', 'company', 'location', 'town_location', 'posted_date',
+    'application_deadline', 'job_url', 'work_mode', 'industry',
+    'compensation', 'company_info', 'employment_type',
+    'required_qualifications', 'preferred_qualifications', 'responsibilities',
+    'benefits', 'department_size', 'key_skills', 'languages',
+    'application_method'
+]
+JSON_COLUMNS = {'compensation', 'company_info'}
+ARRAY_COLUMNS = {
+    'required_qualifications', 'preferred_qualifications', 'responsibilities',
+    'benefits', 'key_skills', 'languages'
+}
+
+# Columns replaced when a job with the same id is uploaded again
+UPSERT_ASSIGNMENTS = ', '.join(f"{c} = EXCLUDED.{c}" for c in JOBS_COLUMNS if c != 'id')
+
+POSTGRES_JOBS_DDL = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    title TEXT,
+    company TEXT,
+    location TEXT,
+    town_location TEXT,
+    posted_date DATE,
+    application_deadline DATE,
+    job_url TEXT,
+    work_mode TEXT,
+    industry TEXT,
+    compensation JSONB,
+    company_info JSONB,
+    employment_type TEXT,
+    required_qualifications TEXT[],
+    preferred_qualifications TEXT[],
+    responsibilities TEXT[],
+    benefits TEXT[],
+    department_size TEXT,
+    key_skills TEXT[],
+    languages TEXT[],
+    application_method TEXT
+)
+"""
+
+SQLITE_JOBS_DDL = f"""
+CREATE TABLE IF NOT EXISTS jobs (
+    {', '.join(f'{c} TEXT PRIMARY KEY' if c == 'id' else f'{c} TEXT' for c in JOBS_COLUMNS)}
+)
+"""
+
+
+class JobSink:
+    """Base class for storage targets of formatted job rows."""
+
+    name = "base"
+
+    def write_jobs(self, rows: List[Dict[str, Any]]) -> int:
+        """Write formatted rows and return the number of rows stored."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class SupabaseSink(JobSink):
+    """Row-by-row upserts through the hosted Supabase REST API."""
+
+    name = "supabase"
+
+    def __init__(self, url: str, key: str):
+        from supabase import create_client
+        self.client = create_client(url, key)
+
+    def write_jobs(self, rows: List[Dict[str, Any]]) -> int:
+        successful_uploads = 0
+        for index, row in enumerate(rows):
+            try:
+                # Upsert like the SQL sinks, so re-running a failed upload does not fail on stored ids
+                self.client.table('jobs').upsert(row).execute()
+                successful_uploads += 1
+                print(f"Uploaded job {index + 1}/{len(rows)}: {row['id']} - {row['title']}")
+            except Exception as e:
+                print(f"Failed to upload job {index + 1}/{len(rows)}: {str(e)}")
+        return successful_uploads
+
+
+def _pg_array_literal(values: list) -> str:
+    """Render a list of strings as a PostgreSQL array literal."""
+    items = []
+    for value in values:
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"')
+        items.append(f'"{escaped}"')
+    return '{' + ','.join(items) + '}'
+
+
+class PostgresSink(JobSink):
+    """Bulk load into a direct PostgreSQL connection using COPY."""
+
+    name = "postgres"
+
+    def __init__(self, dsn: str, create_table: bool = True):
+        import psycopg2
+        self.conn = psycopg2.connect(dsn)
+        if create_table:
+            with self.conn, self.conn.cursor() as cur:
+                cur.execute(POSTGRES_JOBS_DDL)
+
+    def _to_csv(self, rows: List[Dict[str, Any]]) -> io.StringIO:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            record = []
+            for column in JOBS_COLUMNS:
+                value = row.get(column)
+                if value is None:
+                    record.append(r'\N')
+                elif column in JSON_COLUMNS:
+                    record.append(json.dumps(value, ensure_ascii=False))
+                elif column in ARRAY_COLUMNS:
+                    record.append(_pg_array_literal(value))
+                else:
+                    record.append(value)
+            writer.writerow(record)
+        buffer.seek(0)
+        return buffer
+
+    def write_jobs(self, rows: List[Dict[str, Any]]) -> int:
+        if not rows:
+            return 0
+        columns = ', '.join(JOBS_COLUMNS)
+        with self.conn, self.conn.cursor() as cur:
+            # COPY into a staging table, then upsert: a corrected re-upload replaces the stored rows,
+            # the same as INSERT OR REPLACE in the SQLite sink
+            cur.execute("CREATE TEMP TABLE jobs_staging (LIKE jobs INCLUDING DEFAULTS) ON COMMIT DROP")
+            cur.copy_expert(
+                f"COPY jobs_staging ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                self._to_csv(rows)
+            )
+            cur.execute(
+                f"INSERT INTO jobs ({columns}) SELECT {columns} FROM jobs_staging "
+                f"ON CONFLICT (id) DO UPDATE SET {UPSERT_ASSIGNMENTS}"
+            )
+            written = cur.rowcount
+        print(f"Copied {len(rows)} jobs into PostgreSQL ({written} inserted or updated)")
+        return written
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class SQLiteSink(JobSink):
+    """Local SQLite file for laptops and CI."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(SQLITE_JOBS_DDL)
+
+    def write_jobs(self, rows: List[Dict[str, Any]]) -> int:
+        if not rows:
+            return 0
+        placeholders = ', '.join('?' for _ in JOBS_COLUMNS)
+        records = []
+        for row in rows:
+            record = []
+            for column in JOBS_COLUMNS:
+                value = row.get(column)
+                if column in JSON_COLUMNS or column in ARRAY_COLUMNS:
+                    value = json.dumps(value, ensure_ascii=False)
+                record.append(value)
+            records.append(record)
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(JOBS_COLUMNS)}) VALUES ({placeholders})",
+                records
+            )
+        print(f"Wrote {len(records)} jobs to SQLite")
+        return len(records)
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def get_sink(kind: str = None) -> JobSink:
+    """Create the sink selected by JOB_SINK (supabase, postgres or sqlite)."""
+    kind = (kind or os.getenv('JOB_SINK') or 'supabase').lower()
+
+    if kind == 'supabase':
+        supabase_url = os.getenv('SUPABASE_URL')
+        supabase_key = os.getenv('SUPABASE_KEY')
+        if not supabase_url or not supabase_key:
+            raise ValueError("SUPABASE_URL and SUPABASE_KEY environment variables must be set")
+        return SupabaseSink(supabase_url, supabase_key)
+
+    if kind == 'postgres':
+        dsn = os.getenv('DATABASE_URL')
+        if not dsn:
+            raise ValueError("DATABASE_URL environment variable must be set for the postgres sink")
+        return PostgresSink(dsn)
+
+    if kind == 'sqlite':
+        return SQLiteSink(os.getenv('SQLITE_PATH', 'jobs.db'))
+
+    raise ValueError(f"Unknown JOB_SINK: {kind}")
@@ -0,0 +1,303 @@
+"""
+Job sources: pluggable scrapers that yield normalized job_detail records.
+
+A source subclasses JobSource and is registered with @register_source. It
+implements either fetch() (blocking, e.g. a Selenium scraper; run in a worker
+thread) or fetch_async() (a coroutine that schedules its own work). run_sources()
+runs the selected sources at the same time, so a run takes as long as its
+slowest source, then merges their jobs and drops vacancies that more than one
+source listed. Browser sources share a DriverPool of at most BROWSER_POOL_SIZE
+Chrome sessions.
+
+The pipeline's scrape stage runs the sources in JOB_SOURCES (default "ess").
+
+    python sources.py list
+    python sources.py run --sources ess,feed --limit 50
+"""
+import argparse
+import asyncio
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Type
+
+from dotenv import load_dotenv
+
+from http_transport import get_transport
+from jsonl_io import stage_path, write_records
+from metrics import get_metrics, write_run_metrics
+from network_capture import find_vacancies, map_vacancy
+from profiling import configure_profiling, profile_stage, profile_thread
+from shards import dedupe
+
+load_dotenv()
+
+JOB_SOURCES = os.getenv('JOB_SOURCES', 'ess')
+BROWSER_POOL_SIZE = int(os.getenv('BROWSER_POOL_SIZE', '2'))
+# Comma separated URLs of JSON vacancy feeds read by the "feed" source
+JOB_FEED_URLS = os.getenv('JOB_FEED_URLS', '')
+
+# Every record leaving a source has these keys
+JOB_DEFAULTS = {
+    'job_id': '',
+    'title': 'Unknown',
+    'company': 'Unknown',
+    'location': '',
+    'job_url': '',
+    'description': '',
+    'requirements': [],
+    'benefits': [],
+    'application_method': '',
+    'contact_info': '',
+}
+
+SOURCES: Dict[str, Type['JobSource']] = {}
+
+
+def register_source(cls: Type['JobSource']) -> Type['JobSource']:
+    """Class decorator adding a source to the registry under its name."""
+    SOURCES[cls.name] = cls
+    return cls
+
+
+def get_source(name: str) -> 'JobSource':
+    if name not in SOURCES:
+        raise ValueError(f"Unknown job source {name!r}, available: {', '.join(sorted(SOURCES))}")
+    return SOURCES[name]()
+
+
+def normalize_job(record: Dict[str, Any], source: str) -> Dict[str, Any]:
+    """Fill in the job_detail keys a source left out and tag the record with its source."""
+    job = {**JOB_DEFAULTS, **{key: value for key, value in record.items() if value is not None}}
+    job['job_id'] = str(job['job_id'])
+    for field in ('requirements', 'benefits'):
+        if not isinstance(job[field], list):
+            job[field] = [line for line in str(job[field]).split('\n') if line.strip()]
+    job['source'] = source
+    return job
+
+
+def _text_key(value: str) -> str:
+    return re.sub(r'\W+', ' ', (value or '').casefold()).strip()
+
+
+def vacancy_key(job: Dict[str, Any]) -> str:
+    """Identity of a vacancy across sources, whose IDs and URLs differ: its title and company."""
+    return f"{_text_key(job.get('title', ''))}|{_text_key(job.get('company', ''))}"
+
+
+def dedupe_sources(results: Iterable[List[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+    """
+    Merge per-source job lists in order, dropping repeated vacancies: within
+    a source by ID or URL, across sources by title and company.
+
+    Title and company are only compared with earlier sources' jobs; one source
+    can list the same title and company twice (e.g. in two towns).
+    """
+    earlier = set()
+    for source_jobs in results:
+        keys = set()
+        for job in dedupe(source_jobs):
+            key = vacancy_key(job)
+            if key == '|' or key not in earlier:
+                keys.add(key)
+                yield job
+        earlier |= keys
+
+
+class DriverPool:
+    """Chrome sessions shared by browser sources; at most `size` are in use at once."""
+
+    def __init__(self, size: int = BROWSER_POOL_SIZE):
+        self._slots = threading.BoundedSemaphore(max(1, size))
+        self._idle = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def lend(self, scraper):
+        """Let an ESSJobScraper use an idle browser (or start one) and take it back afterwards."""
+        with self._slots:
+            with self._lock:
+                driver = self._idle.pop() if self._idle else None
+            scraper.use_driver(driver)
+            try:
+                yield scraper
+            finally:
+                driver = scraper.release_driver()
+                if driver is not None:
+                    with self._lock:
+                        self._idle.append(driver)
+
+    def close(self) -> None:
+        with self._lock:
+            drivers, self._idle = self._idle, []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+class JobSource:
+    """A job board. Subclasses set `name` and implement fetch() or fetch_async()."""
+
+    name = ''
+    uses_browser = False
+
+    def fetch(self, limit: Optional[int] = None, pool: Optional[DriverPool] = None) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def fetch_async(self, limit: Optional[int] = None,
+                          pool: Optional[DriverPool] = None) -> List[Dict[str, Any]]:
+        # Blocking sources run in a worker thread so they don't hold up the others
+        return await asyncio.to_thread(self._fetch_in_thread, limit, pool)
+
+    def _fetch_in_thread(self, limit: Optional[int], pool: Optional[DriverPool]) -> List[Dict[str, Any]]:
+        # The scrape stage's cProfile only sees the event loop's thread
+        with profile_thread():
+            return self.fetch(limit, pool)
+
+
+@register_source
+class ESSSource(JobSource):
+    """Today's vacancies on ess.gov.si, scraped with Selenium."""
+
+    name = 'ess'
+    uses_browser = True
+
+    def fetch(self, limit: Optional[int] = None, pool: Optional[DriverPool] = None) -> List[Dict[str, Any]]:
+        from scraper import ESSJobScraper
+        scraper = ESSJobScraper()
+        if pool is None:
+            return scraper.scrape_jobs_with_selenium(limit=limit)
+        with pool.lend(scraper):
+            return scraper.scrape_jobs_with_selenium(limit=limit)
+
+
+@register_source
+class JsonFeedSource(JobSource):
+    """
+    Vacancies from the JSON feeds in JOB_FEED_URLS.
+
+    The feeds are fetched concurrently, each with a blocking request through
+    the shared HTTP transport in its own worker thread. Vacancy objects are
+    found and mapped with the same field aliases as the ESS network capture,
+    so feeds with Slovenian or English keys both work.
+    """
+
+    name = 'feed'
+
+    def __init__(self, urls: Optional[List[str]] = None):
+        self.urls = urls if urls is not None else [url.strip() for url in JOB_FEED_URLS.split(',') if url.strip()]
+
+    def _get_json(self, url: str) -> Any:
+        with profile_thread():
+            response = get_transport().get(url)
+            response.raise_for_status()
+            return response.json()
+
+    async def fetch_async(self, limit: Optional[int] = None,
+                          pool: Optional[DriverPool] = None) -> List[Dict[str, Any]]:
+        if not self.urls:
+            print("feed: JOB_FEED_URLS is not set, nothing to fetch")
+            return []
+        payloads = await asyncio.gather(*(asyncio.to_thread(self._get_json, url) for url in self.urls),
+                                        return_exceptions=True)
+        jobs = []
+        for url, payload in zip(self.urls, payloads):
+            if isinstance(payload, Exception):
+                print(f"feed: could not read {url}: {payload}")
+                continue
+            for record in find_vacancies(payload):
+                job = map_vacancy(record)
+                job.setdefault('job_url', url)
+                jobs.append(job)
+        return jobs[:limit] if limit is not None else jobs
+
+
+async def _run_source(source: JobSource, limit: Optional[int], pool: DriverPool) -> Optional[List[Dict[str, Any]]]:
+    """The source's normalized jobs, or None if it failed."""
+    started = time.perf_counter()
+    try:
+        records = await source.fetch_async(limit, pool)
+    except Exception as e:
+        print(f"Error in source {source.name}: {e}")
+        get_metrics().record("source.fetch", time.perf_counter() - started, source=source.name, status="error")
+        get_metrics().increment("source.failures")
+        return None
+    jobs = [normalize_job(record, source.name) for record in records]
+    get_metrics().record("source.fetch", time.perf_counter() - started, source=source.name, jobs=len(jobs))
+    print(f"Source {source.name}: {len(jobs)} jobs in {time.perf_counter() - started:.1f}s")
+    return jobs
+
+
+async def _run_all(sources: List[JobSource], limit: Optional[int],
+                   pool: DriverPool) -> List[Optional[List[Dict[str, Any]]]]:
+    return await asyncio.gather(*(_run_source(source, limit, pool) for source in sources))
+
+
+def run_sources(names: Iterable[str], limit: Optional[int] = None,
+                browsers: int = BROWSER_POOL_SIZE) -> List[Dict[str, Any]]:
+    """
+    Run the named sources concurrently and merge their jobs in source order.
+
+    A vacancy listed by several sources is kept from the first one named.
+    Raises RuntimeError once every source has finished if any of them failed,
+    so a day is never saved without a source's vacancies.
+    """
+    sources = [get_source(name.strip()) for name in names if name.strip()]
+    pool = DriverPool(browsers)
+    try:
+        results = asyncio.run(_run_all(sources, limit, pool))
+    finally:
+        pool.close()
+
+    failed = [source.name for source, source_jobs in zip(sources, results) if source_jobs is None]
+    if failed:
+        raise RuntimeError(f"Failed sources: {', '.join(failed)}")
+
+    jobs = list(dedupe_sources(results))
+    total = sum(len(source_jobs) for source_jobs in results)
+    print(f"Merged {len(sources)} sources: {len(jobs)} jobs ({total - len(jobs)} duplicates dropped)")
+    return jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run job sources and merge their vacancies")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help="show the registered sources")
+    run_parser = subparsers.add_parser('run', help="scrape the sources into today's raw file")
+    run_parser.add_argument('--sources', default=JOB_SOURCES, help=f"comma separated (default {JOB_SOURCES})")
+    run_parser.add_argument('--limit', type=int, default=None, help="stop each source after this many vacancies")
+    run_parser.add_argument('--browsers', type=int, default=BROWSER_POOL_SIZE, help="Chrome sessions at most")
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for name, cls in sorted(SOURCES.items()):
+            print(f"{name:8} {'browser' if cls.uses_browser else 'http':8} {(cls.__doc__ or '').strip().splitlines()[0]}")
+        return 0
+
+    try:
+        with get_metrics().span("stage.scrape"), profile_stage("scrape"):
+            jobs = run_sources(args.sources.split(','), args.limit, args.browsers)
+    except (ValueError, RuntimeError) as e:
+        print(f"Error: {e}")
+        return 1
+    if not jobs:
+        print("No jobs found")
+        return 0
+    raw_file = stage_path('raw', datetime.now().strftime('%Y%m%d'))
+    saved = write_records(raw_file, jobs)
+    print(f"Saved {saved} jobs to {raw_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    configure_profiling()
+    exit_code = main()
+    write_run_metrics()
+    sys.exit(exit_code)
@@ -0,0 +1,38 @@
+from job_schema import validate_jobs
+
+GOOD = {'title': ' Razvijalec ', 'company': 'ACME d.o.o. ', 'posted_date': '2025-03-04'}
+
+
+def test_row_is_normalized_the_same_with_and_without_invalid_neighbours():
+    alone, _ = validate_jobs([GOOD], '20250304')
+    mixed, errors = validate_jobs([GOOD, {'title': 5}], '20250304')
+    assert not errors
+    assert alone[0] == mixed[0]
+    assert alone[0]['title'] == 'Razvijalec'
+    assert alone[0]['company'] == 'ACME d.o.o.'
+
+
+def test_impossible_date_is_rejected_in_an_otherwise_valid_chunk():
+    rows, errors = validate_jobs([GOOD, {'title': 'Kuhar', 'posted_date': '2025-02-30'}], '20250304')
+    assert [row['title'] for row in rows] == ['Razvijalec']
+    assert len(errors) == 1 and errors[0].index == 1
+
+
+def test_llm_shapes_are_repaired_instead_of_rejected():
+    job = {**GOOD, 'compensation': '', 'company_info': '', 'key_skills': 'Python, SQL ,', 'languages': None,
+           'application_deadline': '20250401'}
+    rows, errors = validate_jobs([job], '20250304')
+    assert not errors
+    row = rows[0]
+    assert row['compensation'] == {} and row['company_info'] == {}
+    assert row['key_skills'] == ['Python', 'SQL']
+    assert row['languages'] == []
+    assert row['application_deadline'] == '2025-04-01'
+
+
+def test_rows_get_ids_placeholders_and_iso_dates():
+    rows, errors = validate_jobs([GOOD, {'title': '  ', 'posted_date': None}], '20250304', start_index=10)
+    assert not errors
+    assert [row['id'] for row in rows] == ['zavod_20250304_11', 'zavod_20250304_12']
+    assert rows[1]['title'] == 'Untitled Position' and rows[1]['location'] == 'Slovenia'
+    assert [row['posted_date'] for row in rows] == ['2025-03-04', '2025-03-04']
@@ -0,0 +1,17 @@
+from jsonl_io import append_records, find_stage_files, read_records
+
+
+def test_find_stage_files_skips_partial_and_increment_files(tmp_path):
+    for name in ('jobs_analyzed_20250301.jsonl.gz', 'jobs_analyzed_20250302.jsonl.gz.tmp.gz',
+                 'jobs_analyzed_20250303_poll101010.jsonl.gz', 'jobs_analyzed_20250304.json'):
+        (tmp_path / name).write_bytes(b'')
+    found = [path.replace(str(tmp_path), '').lstrip('/\\') for path in find_stage_files('analyzed', str(tmp_path))]
+    assert found == ['jobs_analyzed_20250301.jsonl.gz', 'jobs_analyzed_20250304.json']
+
+
+def test_append_records_keeps_earlier_records(tmp_path):
+    for name in ('a.jsonl', 'a.jsonl.gz', 'a.jsonl.zst'):
+        path = str(tmp_path / name)
+        append_records(path, [{'i': 1}])
+        assert append_records(path, [{'i': 2}, {'i': 3}]) == 2
+        assert [record['i'] for record in read_records(path)] == [1, 2, 3]
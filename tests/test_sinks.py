@@ -0,0 +1,84 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+from sinks import JOBS_COLUMNS, PostgresSink, SQLiteSink
+
+
+def make_row(job_id, title):
+    row = {column: None for column in JOBS_COLUMNS}
+    row.update(id=job_id, title=title, company='ACME d.o.o.', posted_date='2025-03-04',
+               key_skills=['Python'], compensation={'min': 1500})
+    return row
+
+
+def test_sqlite_reupload_replaces_row(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    with SQLiteSink(path) as sink:
+        assert sink.write_jobs([make_row('zavod_20250304_1', 'Razvijalec')]) == 1
+        assert sink.write_jobs([make_row('zavod_20250304_1', 'Razvijalec Python')]) == 1
+
+    conn = sqlite3.connect(path)
+    rows = conn.execute("SELECT id, title, key_skills FROM jobs").fetchall()
+    conn.close()
+    assert rows == [('zavod_20250304_1', 'Razvijalec Python', json.dumps(['Python']))]
+
+
+class FakeCursor:
+    def __init__(self, statements):
+        self.statements = statements
+        self.rowcount = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        self.statements.append(sql)
+        self.rowcount = 1
+
+    def copy_expert(self, sql, buffer):
+        self.statements.append(sql)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.statements = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return FakeCursor(self.statements)
+
+
+def test_postgres_reupload_updates_existing_rows():
+    sink = PostgresSink.__new__(PostgresSink)
+    sink.conn = FakeConnection()
+    sink.write_jobs([make_row('zavod_20250304_1', 'Razvijalec')])
+
+    insert = sink.conn.statements[-1]
+    assert "ON CONFLICT (id) DO UPDATE SET" in insert
+    assert "title = EXCLUDED.title" in insert
+    assert "id = EXCLUDED.id" not in insert
+
+
+@pytest.mark.skipif(not os.getenv('TEST_DATABASE_URL'), reason="TEST_DATABASE_URL not set")
+def test_postgres_reupload_replaces_row():
+    pytest.importorskip('psycopg2')
+    with PostgresSink(os.environ['TEST_DATABASE_URL']) as sink:
+        with sink.conn, sink.conn.cursor() as cur:
+            cur.execute("DELETE FROM jobs WHERE id = 'test_reupload_1'")
+        sink.write_jobs([make_row('test_reupload_1', 'Razvijalec')])
+        sink.write_jobs([make_row('test_reupload_1', 'Razvijalec Python')])
+        with sink.conn, sink.conn.cursor() as cur:
+            cur.execute("SELECT title FROM jobs WHERE id = 'test_reupload_1'")
+            assert cur.fetchall() == [('Razvijalec Python',)]
+            cur.execute("DELETE FROM jobs WHERE id = 'test_reupload_1'")
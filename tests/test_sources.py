@@ -0,0 +1,16 @@
+from sources import dedupe_sources
+
+
+def job(job_id, title, company):
+    return {'job_id': job_id, 'title': title, 'company': company, 'job_url': ''}
+
+
+def test_same_title_and_company_within_a_source_are_kept():
+    ess = [job('1', 'Prodajalec', 'ACME d.o.o.'), job('2', 'Prodajalec', 'ACME d.o.o.')]
+    assert [j['job_id'] for j in dedupe_sources([ess])] == ['1', '2']
+
+
+def test_later_source_duplicates_are_dropped():
+    ess = [job('1', 'Prodajalec', 'ACME d.o.o.'), job('1', 'Prodajalec', 'ACME d.o.o.')]
+    feed = [job('9', 'prodajalec', 'Acme d.o.o.'), job('8', 'Kuhar', 'Gostilna')]
+    assert [j['job_id'] for j in dedupe_sources([ess, feed])] == ['1', '8']
@@ -1,169 +1,121 @@
-import json
 from datetime import datetime
 import os
-from supabase import create_client
-from typing import Dict, Any
-import random
+import re
+import sys
+from typing import List, Optional
 from dotenv import load_dotenv
+from job_schema import RowError, validate_jobs
+from jsonl_io import batched, find_stage_file, read_records, stage_path
+from metrics import get_metrics, write_run_metrics
+from profiling import configure_profiling, profile_stage
+from sinks import JobSink, get_sink
 
 load_dotenv()
 
-def upload_to_supabase(analyzed_file: str) -> None:
-    """Upload analyzed jobs to Supabase table."""
-    try:
-        # Load the analyzed jobs data with UTF-8 encoding
-        with open(analyzed_file, 'r', encoding='utf-8') as f:
-            try:
-                jobs = json.load(f)
-                if not isinstance(jobs, list):
-                    jobs = []
-            except json.JSONDecodeError:
-                print("Error reading jobs file, starting with empty list")
-                jobs = []
-        
-        # Configure Supabase client with proper encoding
-        supabase_url = os.getenv('SUPABASE_URL')
-        supabase_key = os.getenv('SUPABASE_KEY')
-        
-        if not supabase_url or not supabase_key:
-            print("Error: SUPABASE_URL and SUPABASE_KEY environment variables must be set")
-            return
-            
-        supabase = create_client(supabase_url, supabase_key)
-        
-        successful_uploads = 0
-        total_jobs = len(jobs)
-        
-        # Upload each job to Supabase
-        for index, job in enumerate(jobs):
-            try:
-                formatted_job = format_job_for_upload(job, index)
-                
-                # Insert into Supabase table
-                result = supabase.table('jobs').insert(formatted_job).execute()
-                successful_uploads += 1
-                print(f"Uploaded job {index + 1}/{total_jobs}: {formatted_job['job_id']} - {formatted_job['title']}")
-                
-            except Exception as e:
-                print(f"Failed to upload job {index + 1}/{total_jobs}: {str(e)}")
-                continue
-        
-        print(f"\nUpload Summary:")
-        print(f"Total jobs processed: {total_jobs}")
-        print(f"Successfully uploaded: {successful_uploads}")
-        print(f"Failed uploads: {total_jobs - successful_uploads}")
-        
-    except Exception as e:
-        print(f"Error during upload process: {str(e)}")
+UPLOAD_BATCH_SIZE = 5000
 
-def safe_strip(value: Any) -> str:
-    """Safely convert any value to a stripped string while preserving special characters."""
-    if value is None:
-        return ""
-    try:
-        # Convert to string and strip whitespace while preserving special characters
-        return str(value).strip()
-    except:
-        return ""
+def run_date_from_filename(analyzed_file: str) -> Optional[str]:
+    """Extract the YYYYMMDD run date from an analyzed file name, if present."""
+    match = re.search(r'(\d{8})', os.path.basename(analyzed_file))
+    return match.group(1) if match else None
 
-def format_job_for_upload(job: Dict[str, Any], index: int) -> Dict[str, Any]:
-    """Format job data to match the Supabase table schema exactly."""
+def report_invalid_jobs(errors: List[RowError]) -> None:
+    """Print the validation errors of jobs that will not be uploaded."""
+    for error in errors:
+        print(f"Skipping invalid job {error.index + 1} ({error.title or 'no title'}):")
+        for message in error.errors:
+            print(f"  - {message}")
+
+def upload_jobs(analyzed_file: str, sink: Optional[JobSink] = None, start_index: int = 0) -> int:
+    """
+    Upload analyzed jobs to the configured sink (see sinks.get_sink).
     
-    def safe_list(value: Any) -> list:
-        """Safely convert any value to a list while preserving special characters."""
-        if isinstance(value, list):
-            return [str(item) for item in value if item is not None]
-        return []
+    Row ids continue from start_index, so a file holding a later part of the
+    day (daemon mode) gets the same ids the full day's file would.
+
+    Returns the number of rows uploaded. Raises if the sink cannot be set up
+    or stores fewer rows than passed validation, so callers never mistake a
+    failed upload for a finished one.
+    """
+    run_date = run_date_from_filename(analyzed_file)
     
-    def safe_dict(value: Any) -> dict:
-        """Safely convert any value to a dict."""
-        if isinstance(value, dict):
-            return value
-        return {}
+    owns_sink = sink is None
+    if owns_sink:
+        sink = get_sink()
     
-    # Create a unique ID based on date and sequence number
-    today = datetime.now().strftime('%Y%m%d')
-    unique_id = f"zavod_{today}_{index + 1}"  # e.g., zavod_20240404_1
+    total_jobs = 0
+    rejected_jobs = 0
+    successful_uploads = 0
+    try:
+        # Validate and write in batches so memory stays flat regardless of file size
+        for batch in batched(read_records(analyzed_file), UPLOAD_BATCH_SIZE):
+            rows, errors = validate_jobs(batch, run_date, start_index=start_index + total_jobs)
+            report_invalid_jobs(errors)
+            with get_metrics().span("upload.batch", sink=sink.name, rows=len(rows)) as batch_span:
+                uploaded = sink.write_jobs(rows)
+                batch_span["uploaded"] = uploaded
+            successful_uploads += uploaded
+            get_metrics().increment("upload.rejected_jobs", len(errors))
+            total_jobs += len(batch)
+            rejected_jobs += len(errors)
+    finally:
+        if owns_sink:
+            sink.close()
     
+    failed_uploads = total_jobs - rejected_jobs - successful_uploads
+    print(f"\nUpload Summary ({sink.name}):")
+    print(f"Total jobs processed: {total_jobs}")
+    print(f"Rejected by validation: {rejected_jobs}")
+    print(f"Successfully uploaded: {successful_uploads}")
+    print(f"Failed uploads: {failed_uploads}")
+    if failed_uploads > 0:
+        raise RuntimeError(f"Only {successful_uploads} of {total_jobs - rejected_jobs} valid jobs were uploaded")
+    return successful_uploads
+
+def upload_to_supabase(analyzed_file: str) -> None:
+    """Upload analyzed jobs to Supabase table."""
     try:
-        # Handle dates
-        posted_date = job.get('posted_date', '')
-        if not posted_date or not isinstance(posted_date, str):
-            posted_date = today
-            
-        application_deadline = job.get('application_deadline')
-        if not application_deadline or not isinstance(application_deadline, str):
-            application_deadline = None
-            
-        # Format the job data with proper character encoding
-        formatted_job = {
-            'id': unique_id,  # Use the same unique_id here
-            'title': safe_strip(job.get('title')) or 'Untitled Position',
-            'company': safe_strip(job.get('company')) or 'Unknown Company',
-            'location': safe_strip(job.get('location')) or 'Slovenia',
-            'town_location': safe_strip(job.get('town_location')) or '',
-            'posted_date': posted_date,
-            'application_deadline': application_deadline,
-            'job_url': safe_strip(job.get('job_url')) or '',
-            'work_mode': safe_strip(job.get('work_mode')) or 'Not specified',
-            'industry': safe_strip(job.get('industry')) or '',
-            
-            # JSONB fields with guaranteed structure
-            'compensation': safe_dict(job.get('compensation')),
-            'company_info': safe_dict(job.get('company_info')),
-            
-            # String fields with empty string fallbacks
-            'employment_type': safe_strip(job.get('employment_type')),
-            'department_size': safe_strip(job.get('department_size')),
-            'application_method': safe_strip(job.get('application_method')),
-            
-            # Array fields with empty list fallbacks
-            'required_qualifications': safe_list(job.get('required_qualifications')),
-            'preferred_qualifications': safe_list(job.get('preferred_qualifications')),
-            'responsibilities': safe_list(job.get('responsibilities')),
-            'benefits': safe_list(job.get('benefits')),
-            'key_skills': safe_list(job.get('key_skills')),
-            'languages': safe_list(job.get('languages'))
-        }
-        
-        return formatted_job
-        
+        sink = get_sink('supabase')
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    try:
+        upload_jobs(analyzed_file, sink)
     except Exception as e:
-        # If anything goes wrong, return a valid but empty job record
-        print(f"Error formatting job {index + 1}, using fallback data: {str(e)}")
-        return {
-            'id': unique_id,  # Still use the unique_id even in error case
-            'title': 'Error Processing Job',
-            'company': 'Unknown Company',
-            'location': 'Slovenia',
-            'town_location': '',
-            'posted_date': today,
-            'application_deadline': None,
-            'job_url': '',
-            'work_mode': 'Not specified',
-            'industry': '',
-            'compensation': {},
-            'company_info': {},
-            'employment_type': '',
-            'required_qualifications': [],
-            'preferred_qualifications': [],
-            'responsibilities': [],
-            'benefits': [],
-            'department_size': '',
-            'key_skills': [],
-            'languages': [],
-            'application_method': ''
-        }
+        print(f"Error during upload process: {str(e)}")
 
 def main():
-    # Get the analyzed jobs file
-    today = datetime.now().strftime('%Y%m%d')
-    analyzed_file = f"jobs_analyzed_{today}.json"
-    if not os.path.exists(analyzed_file):
-        print(f"Error: Analyzed jobs file {analyzed_file} not found")
-        return
+    # Upload the given analyzed files (backfill), or today's analyzed file by default
+    analyzed_files = sys.argv[1:]
+    if not analyzed_files:
+        today = datetime.now().strftime('%Y%m%d')
+        analyzed_files = [find_stage_file('analyzed', today) or stage_path('analyzed', today)]
+    
+    missing = [path for path in analyzed_files if not os.path.exists(path)]
+    if missing:
+        print(f"Error: Analyzed jobs file(s) not found: {', '.join(missing)}")
+        return 1
+    
+    try:
+        sink = get_sink()
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
     
-    upload_to_supabase(analyzed_file)
+    failed = 0
+    with sink:
+        for analyzed_file in analyzed_files:
+            print(f"\nUploading {analyzed_file}")
+            try:
+                with get_metrics().span("stage.upload", file=analyzed_file), profile_stage("upload"):
+                    upload_jobs(analyzed_file, sink)
+            except Exception as e:
+                print(f"Error during upload process: {str(e)}")
+                failed += 1
+    return 1 if failed else 0
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    configure_profiling()
+    exit_code = main()
+    write_run_metrics()
+    sys.exit(exit_code)